@@ -0,0 +1,61 @@
+# benchmark for the FastAPI app: requests/second at different numbers of concurrent clients
+#
+# start the API first (uvicorn database_api:app) and then run from the project root:
+#   python -m benchmarks.api_concurrency --base-url http://127.0.0.1:8000
+# run it once on the old code and once on the new code to compare before/after.
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+_local = threading.local()
+
+
+def get_session():
+    # one keep-alive session per client thread
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def do_request(base_url, path, vote_influencer_id):
+    session = get_session()
+    if path == "vote":
+        response = session.put(f"{base_url}/Votes/{vote_influencer_id}", json={"good_vote": 1, "bad_vote": 0})
+    else:
+        response = session.get(f"{base_url}{path}")
+    return response.status_code < 500
+
+
+def run_level(base_url, clients, total_requests, paths, vote_influencer_id):
+    # each request cycles through the list of paths so reads and vote writes are mixed
+    jobs = [paths[i % len(paths)] for i in range(total_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(lambda path: do_request(base_url, path, vote_influencer_id), jobs))
+    elapsed = time.perf_counter() - start
+    failures = results.count(False)
+    return total_requests / elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", default="1,16,128", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per concurrency level")
+    parser.add_argument("--paths", default="/Influencers,/Votes,/VibeScoreHistory,vote",
+                        help="comma separated paths, 'vote' means a PUT /Votes/{id}")
+    parser.add_argument("--vote-influencer-id", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = args.paths.split(",")
+    print(f"{'clients':>8} {'req/s':>10} {'failures':>9}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        rps, failures = run_level(args.base_url, clients, args.requests, paths, args.vote_influencer_id)
+        print(f"{clients:>8} {rps:>10.1f} {failures:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# benchmark for start-up cost: import time and peak memory of a fresh interpreter importing a module.
+# nothing here needs a running database, importing the API must not touch it.
+#
+#   python -m benchmarks.api_startup --modules database_api,vibescore,sentiment_analysis --runs 5
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# runs in a fresh interpreter so every import is cold
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def measure(module):
+    result = subprocess.run([sys.executable, "-c", PROBE, module], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", default="database_api,vibescore,sentiment_analysis")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<22} {'import ms (median)':>19} {'peak RSS MB':>12}")
+    for module in args.modules.split(","):
+        samples = [measure(module) for _ in range(args.runs)]
+        seconds = statistics.median(sample["seconds"] for sample in samples)
+        rss_mb = statistics.median(sample["max_rss_kb"] for sample in samples) / 1024
+        print(f"{module:<22} {seconds * 1000:>19.1f} {rss_mb:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmark for the memory use of the YouTube CSV ingestion: peak RSS of loading the whole file with one
+# pd.read_csv against streaming it in chunks, for growing file sizes. the streamed load should stay flat.
+#
+# like ingest_throughput it needs a MySQL server and re-creates a scratch database for every load:
+#   python -m benchmarks.ingest_memory --rows 100000,400000,1600000 --chunksize 50000
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+from benchmarks.ingest_throughput import make_data, fresh_database
+from main import add_influencers
+
+# runs in a fresh interpreter so the peak RSS belongs to one load only
+PROBE = """
+import json, resource, sys
+import mysql.connector, os
+import pandas as pd
+from main import add_videos_with_name_mapping, process_yt_videos_csv
+mode, path, database, chunksize = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+connection = mysql.connector.connect(host=os.getenv('DB_HOST'), user=os.getenv('DB_USER'),
+                                     password=os.getenv('DB_PASS'), database=database)
+if mode == "full":
+    add_videos_with_name_mapping(connection, pd.read_csv(path))
+else:
+    process_yt_videos_csv(connection, path, chunksize=chunksize)
+print(json.dumps({"max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def write_csv(path, rows, influencers):
+    # written in pieces so generating a big file doesn't need it all in memory either
+    piece = 100000
+    for start in range(0, rows, piece):
+        count = min(piece, rows - start)
+        frame = pd.DataFrame({
+            'Name': [f"Influencer {(start + i) % influencers}" for i in range(count)],
+            'Title': ["title"] * count,
+            'URL': [f"https://www.youtube.com/watch?v={(start + i) % influencers}" for i in range(count)],
+            'comment': [f"comment {start + i} " + "x" * 80 for i in range(count)],
+        })
+        frame.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def measure(mode, path, database, chunksize, influencers):
+    connection = fresh_database(database)
+    add_influencers(connection, make_data(influencers, 0, 0)[0])
+    connection.close()
+    result = subprocess.run([sys.executable, "-c", PROBE, mode, path, database, str(chunksize)], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} load failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])["max_rss_kb"] / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="100000,400000,1600000")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--influencers", type=int, default=200)
+    parser.add_argument("--database", default="vibecheck_ingest_bench")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'file MB':>8} {'full read MB':>13} {'streamed MB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in (int(value) for value in args.rows.split(",")):
+            path = os.path.join(directory, f"yt_{rows}.csv")
+            write_csv(path, rows, args.influencers)
+            file_mb = os.path.getsize(path) / 1024 / 1024
+            full = measure("full", path, args.database, args.chunksize, args.influencers)
+            streamed = measure("stream", path, args.database, args.chunksize, args.influencers)
+            print(f"{rows:>9} {file_mb:>8.1f} {full:>13.1f} {streamed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmark for the CSV loaders in main.py: the old row-by-row loaders (SELECT per row, INSERT, commit)
+# against the bulk ones (one lookup per load, in-memory dedup, batched executemany).
+#
+# needs a MySQL server (the DB_HOST/DB_USER/DB_PASS keys from .env). it works in its own scratch database,
+# which is dropped and re-created for every run, so point --database at something you don't care about:
+#   python -m benchmarks.ingest_throughput --influencers 200 --comments 20000 --articles 5000
+
+import argparse
+import os
+import time
+import mysql.connector
+import pandas as pd
+from main import (create_influencers_table, create_news_table, create_videos_table, create_votes_table,
+                  add_influencers, add_videos_with_name_mapping, add_news)
+
+NAME_MAPPING = {'Diddy': 'P Diddy', 'The Rock': 'Dwayne Johnson', 'CaseyNeistat': 'Casey Neistat',
+                'PowerfulJRE': 'Joe Rogan', 'Kai Cenat Live': 'Kai Cenat'}
+
+
+def make_data(influencers, comments, articles):
+    names = [f"Influencer {i}" for i in range(influencers)]
+    influencers_df = pd.DataFrame({
+        'Name': names,
+        'Image_URL': [f"https://example.com/{i}.jpg" for i in range(influencers)],
+        'Bio': ["bio"] * influencers,
+        'Instagram': ["insta"] * influencers,
+        'YouTube': ["yt"] * influencers,
+    })
+    videos_df = pd.DataFrame({
+        'Name': [names[i % influencers] for i in range(comments)],
+        'Title': ["title"] * comments,
+        'URL': [f"https://www.youtube.com/watch?v={i % influencers}" for i in range(comments)],
+        'comment': [f"comment {i}" for i in range(comments)],
+    })
+    news_df = pd.DataFrame({
+        'Celebrity': [names[i % influencers] for i in range(articles)],
+        'Title': ["title"] * articles,
+        'URL': [f"https://www.tmz.com/article-{i}/" for i in range(articles)],
+        'Content': ["content"] * articles,
+    })
+    return influencers_df, videos_df, news_df
+
+
+# the loaders as they were before the bulk ingestion, minus the per-row prints
+def legacy_add_influencers(connection, data):
+    with connection.cursor() as cursor:
+        for _, row in data.iterrows():
+            cursor.execute("SELECT id FROM Influencers WHERE name = %s", (row['Name'],))
+            if cursor.fetchone() is None:
+                cursor.execute("INSERT INTO Influencers (name, image_url, bio, instagram, youtube) VALUES (%s, %s, %s, %s, %s)",
+                               (row['Name'], row['Image_URL'], row['Bio'], row['Instagram'], row['YouTube']))
+                connection.commit()
+
+
+def legacy_add_videos(connection, data):
+    data['Name'] = data['Name'].replace(NAME_MAPPING)
+    with connection.cursor() as cursor:
+        for _, row in data.iterrows():
+            cursor.execute("SELECT id FROM Influencers WHERE name = %s", (row['Name'],))
+            influencer_id = cursor.fetchone()
+            if influencer_id:
+                cursor.execute("SELECT id FROM Videos WHERE url = %s AND comment = %s", (row['URL'], row['comment']))
+                if not cursor.fetchone():
+                    cursor.execute("INSERT INTO Videos (influencer_id, url, title, comment, sentiment_score) VALUES (%s, %s, %s, %s, %s)",
+                                   (influencer_id[0], row['URL'], row['Title'], row['comment'], None))
+                    connection.commit()
+
+
+def legacy_add_news(connection, data):
+    with connection.cursor() as cursor:
+        for _, row in data.iterrows():
+            cursor.execute("SELECT id FROM Influencers WHERE name = %s", (row['Celebrity'],))
+            influencer_id = cursor.fetchone()
+            if influencer_id:
+                cursor.execute("SELECT id FROM News WHERE url = %s", (row['URL'],))
+                if not cursor.fetchone():
+                    cursor.execute("INSERT INTO News (influencer_id, url, title, article, sentiment_score) VALUES (%s, %s, %s, %s, %s)",
+                                   (influencer_id[0], row['URL'], row['Title'], row['Content'], None))
+                    connection.commit()
+
+
+def fresh_database(name):
+    server = mysql.connector.connect(host=os.getenv('DB_HOST'), user=os.getenv('DB_USER'), password=os.getenv('DB_PASS'))
+    with server.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+        cursor.execute(f"CREATE DATABASE {name}")
+    server.close()
+    connection = mysql.connector.connect(host=os.getenv('DB_HOST'), user=os.getenv('DB_USER'),
+                                         password=os.getenv('DB_PASS'), database=name)
+    create_influencers_table(connection)
+    create_news_table(connection)
+    create_videos_table(connection)
+    create_votes_table(connection)
+    return connection
+
+
+def run(loaders, data, database):
+    connection = fresh_database(database)
+    rates = []
+    for loader, frame in zip(loaders, data):
+        start = time.perf_counter()
+        loader(connection, frame.copy())
+        rates.append(len(frame) / (time.perf_counter() - start))
+    connection.close()
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--influencers", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--database", default="vibecheck_ingest_bench")
+    args = parser.parse_args()
+
+    data = make_data(args.influencers, args.comments, args.articles)
+    legacy = run((legacy_add_influencers, legacy_add_videos, legacy_add_news), data, args.database)
+    bulk = run((add_influencers, add_videos_with_name_mapping, add_news), data, args.database)
+
+    print(f"{'table':<12} {'rows':>8} {'row-by-row rows/s':>18} {'bulk rows/s':>12} {'speedup':>8}")
+    for table, frame, old, new in zip(("Influencers", "Videos", "News"), data, legacy, bulk):
+        print(f"{table:<12} {len(frame):>8} {old:>18.0f} {new:>12.0f} {new / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
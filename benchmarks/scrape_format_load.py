@@ -0,0 +1,77 @@
+# benchmark for loading the scraped datasets: the headerless CSV parsed with pd.read_csv against Parquet
+# partitions (one file per scrape run) read with only the columns the loader needs.
+# the text is shaped like the real data, with quotes, commas, newlines and emoji. needs pyarrow.
+#
+#   python -m benchmarks.scrape_format_load --rows 200000 --partitions 20
+
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from scraping.parquet_store import write_partition, list_partitions, read_partition, TMZ_COLUMNS
+
+TEXT = 'He said "no comment", then left ... 😂🔥 fans were not happy,\nmore at 11 ' * 4
+
+
+def make_records(rows):
+    return [(f"Celebrity {i % 20}", f"Title {i}, \"quoted\" 🎤", f"https://www.tmz.com/2024/11/{i}/", f"{i} {TEXT}")
+            for i in range(rows)]
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--partitions", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "tmz_scraped.csv")
+        pd.DataFrame(records, columns=TMZ_COLUMNS).to_csv(csv_path, header=False, index=False)
+        parquet_dir = os.path.join(directory, "tmz_parquet")
+        step = -(-args.rows // args.partitions)
+        for start in range(0, args.rows, step):
+            write_partition(records[start:start + step], parquet_dir, TMZ_COLUMNS)
+        partitions = list_partitions(parquet_dir)
+
+        def load_csv():
+            # what process_tmz_news_csv does
+            return pd.read_csv(csv_path, names=TMZ_COLUMNS, header=None, dtype=str)
+
+        def load_parquet(columns):
+            return pd.concat([read_partition(parquet_dir, name, columns) for name in partitions], ignore_index=True)
+
+        csv_seconds, csv_frame = timed(load_csv, args.repeat)
+        parquet_seconds, parquet_frame = timed(lambda: load_parquet(TMZ_COLUMNS), args.repeat)
+        narrow_seconds, _ = timed(lambda: load_parquet(['Celebrity', 'URL']), args.repeat)
+        newest_seconds, _ = timed(lambda: read_partition(parquet_dir, partitions[-1], TMZ_COLUMNS), args.repeat)
+
+        # both have to give back exactly the text that was written
+        assert list(map(tuple, csv_frame.values.tolist())) == records, "CSV load differs from the records"
+        assert list(map(tuple, parquet_frame.values.tolist())) == records, "Parquet load differs from the records"
+
+        csv_mb = os.path.getsize(csv_path) / 1024 / 1024
+        parquet_mb = sum(os.path.getsize(os.path.join(parquet_dir, name)) for name in partitions) / 1024 / 1024
+        print(f"{args.rows} rows, CSV {csv_mb:.1f} MB, Parquet {parquet_mb:.1f} MB in {len(partitions)} partitions")
+        print(f"{'load':<34} {'seconds':>8} {'rows/s':>11}")
+        for name, seconds, rows in (("CSV, all columns", csv_seconds, args.rows),
+                                    ("Parquet, all partitions", parquet_seconds, args.rows),
+                                    ("Parquet, 2 columns", narrow_seconds, args.rows),
+                                    ("Parquet, newest partition only", newest_seconds, min(step, args.rows))):
+            print(f"{name:<34} {seconds:>8.3f} {rows / seconds:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
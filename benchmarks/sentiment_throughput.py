@@ -0,0 +1,44 @@
+# benchmark for the sentiment engine: texts/second for 1..N worker processes
+#
+# uses the scraped articles and comments in the repo as sample texts, no database needed:
+#   python -m benchmarks.sentiment_throughput --texts 20000 --max-workers 8
+
+import argparse
+import csv
+import os
+import time
+from sentiment_analysis import score_texts_in_chunks
+
+
+def load_sample_texts():
+    texts = []
+    with open("tmz_scraped.csv", newline='', encoding='utf-8') as file:
+        texts.extend(row[3] for row in csv.reader(file) if len(row) > 3)
+    with open("yt_scraped.csv", newline='', encoding='utf-8') as file:
+        texts.extend(row['comment'] for row in csv.DictReader(file))
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=20000, help="number of texts to score per run")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    sample = load_sample_texts()
+    texts = (sample * (args.texts // len(sample) + 1))[:args.texts]
+
+    print(f"{'workers':>8} {'texts/s':>10}")
+    for workers in range(1, args.max_workers + 1):
+        # warm up the worker processes so process start-up is not part of the measurement
+        for _ in score_texts_in_chunks(texts[:args.chunk_size * workers * 2], workers, args.chunk_size):
+            pass
+        start = time.perf_counter()
+        scored = sum(len(scores) for _, scores in score_texts_in_chunks(texts, workers, args.chunk_size))
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {scored / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# microbenchmark for the TMZ HTML extraction: BeautifulSoup + html.parser (the old code) against lxml + XPath.
+#
+# point it at a directory of saved pages (search_*.html and article_*.html, e.g. saved with curl),
+# or leave --fixtures out to use generated pages shaped like the TMZ markup:
+#   python -m benchmarks.tmz_extract --fixtures path/to/saved_pages
+
+import argparse
+import glob
+import os
+import time
+from bs4 import BeautifulSoup
+from scraping.tmz_scraper import parse_search_results, parse_article_content, BASE_URL, ARTICLES_PER_CELEBRITY
+
+FILLER = "<div class='ad'><script>var x = 1;</script><ul>" + "<li><a href='/nav'>Nav link</a></li>" * 40 + "</ul></div>"
+
+
+def legacy_search_results(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
+    for item in soup.select('a.gridler__card-link.gridler__card-link--default.js-track-link.js-click-article'):
+        if len(results) >= ARTICLES_PER_CELEBRITY:
+            break
+        title_tag = item.select_one('h4.gridler__card-title.gridler__card-title--default')
+        title = title_tag.get_text(strip=True) if title_tag else "No title"
+        link = item['href']
+        if not link.startswith('http'):
+            link = BASE_URL + link
+        results.append((title, link))
+    return results
+
+
+def legacy_article_content(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    content_section = soup.find('section', id=lambda x: x and x.startswith("cb-"), attrs={'data-context': '{"section":"permalink","name":"text_block"}'})
+    if not content_section:
+        return None
+    return " ".join(paragraph.get_text(strip=True) for paragraph in content_section.find_all('p'))
+
+
+def generated_fixtures(count):
+    cards = "".join(
+        f"<a class='gridler__card-link gridler__card-link--default js-track-link js-click-article' href='/2024/11/20/story-{i}/'>"
+        f"<img src='/img/{i}.jpg'><h4 class='gridler__card-title gridler__card-title--default'> Beyoncé’s story <b>{i}</b> “title” 😂 </h4></a>"
+        for i in range(24)
+    )
+    search = f"<html><head><title>Search</title></head><body>{FILLER * 20}<main>{cards}</main>{FILLER * 20}</body></html>"
+    paragraphs = "".join(
+        f"<p>Paragraph {i} with <a href='/x'>a link</a> and <em>some</em> text … Beyoncé said “hi” 😂"
+        f"<script>embed({i});</script><style>.embed {{ width: 100% }}</style></p>"
+        for i in range(15)
+    )
+    article = (
+        f"<html><body>{FILLER * 30}"
+        f"<section id='cb-123' data-context='{{\"section\":\"permalink\",\"name\":\"text_block\"}}'>{paragraphs}</section>"
+        f"{FILLER * 30}</body></html>"
+    )
+    # UTF-8 with no <meta charset>, like pages whose charset is only in the Content-Type header
+    return [search.encode("utf-8")] * count, [article.encode("utf-8")] * count
+
+
+def load_fixtures(directory):
+    def read_all(pattern):
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            with open(path, "rb") as file:
+                pages.append(file.read())
+        return pages
+    return read_all("search_*.html"), read_all("article_*.html")
+
+
+def pages_per_second(func, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(page)
+    return len(pages) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory with saved search_*.html and article_*.html pages")
+    parser.add_argument("--pages", type=int, default=20, help="number of generated pages when no fixtures are given")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    searches, articles = load_fixtures(args.fixtures) if args.fixtures else generated_fixtures(args.pages)
+
+    # both versions have to extract the same thing
+    for page in searches:
+        assert legacy_search_results(page) == parse_search_results(page), "search results differ"
+    for page in articles:
+        assert legacy_article_content(page) == parse_article_content(page), "article content differs"
+
+    print(f"{'page type':<10} {'bs4 pages/s':>12} {'lxml pages/s':>13}")
+    for name, pages, legacy, fast in (("search", searches, legacy_search_results, parse_search_results),
+                                       ("article", articles, legacy_article_content, parse_article_content)):
+        if pages:
+            print(f"{name:<10} {pages_per_second(legacy, pages, args.repeat):>12.1f} {pages_per_second(fast, pages, args.repeat):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmark for the vibe score computation on synthetic data:
+# the old per-influencer filtering loop against a single groupby pass + vectorized formula.
+#
+#   python -m benchmarks.vibescore_compute --influencers 10000 --comments 1000000
+#
+# the old loop is O(influencers x rows), so it only runs on --legacy-sample influencers and the
+# time for all influencers is extrapolated from that.
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from vibescore import calculate_vibe_inputs_from_frames, calculate_vibe_scores, calculate_vote_score, normalize_sentiment, calculate_vibe_score
+
+
+def make_data(influencers, comments, articles, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, influencers + 1)
+    news = pd.DataFrame({
+        'influencer_id': rng.choice(ids, articles),
+        'sentiment_score': rng.integers(1, 11, articles).astype(float),
+    })
+    videos = pd.DataFrame({
+        'influencer_id': rng.choice(ids, comments),
+        'sentiment_score': rng.integers(1, 11, comments).astype(float),
+    })
+    votes = pd.DataFrame({
+        'influencer_id': ids,
+        'good_vote': rng.integers(0, 1000, influencers),
+        'bad_vote': rng.integers(0, 1000, influencers),
+    })
+    return news, videos, votes
+
+
+def legacy_vibe_scores(news, videos, votes):
+    # the loop update_vibe_scores used before: filter both tables once per influencer
+    vibe_scores = {}
+    for _, vote_row in votes.iterrows():
+        influencer_id = vote_row['influencer_id']
+        filtered_scores = news[news['influencer_id'] == influencer_id]['sentiment_score']
+        avg_news_sentiment = 0.0 if filtered_scores.empty or filtered_scores.isna().all() else filtered_scores.mean()
+        avg_video_sentiment = videos[videos['influencer_id'] == influencer_id]['sentiment_score'].mean() or 0
+        vote_score = calculate_vote_score(vote_row['good_vote'], vote_row['bad_vote'])
+        vibe_scores[influencer_id] = calculate_vibe_score(normalize_sentiment(avg_news_sentiment), normalize_sentiment(avg_video_sentiment), vote_score)
+    return vibe_scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--influencers", type=int, default=10000)
+    parser.add_argument("--comments", type=int, default=1000000)
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--legacy-sample", type=int, default=100)
+    args = parser.parse_args()
+
+    news, videos, votes = make_data(args.influencers, args.comments, args.articles)
+
+    start = time.perf_counter()
+    legacy_vibe_scores(news, videos, votes.head(args.legacy_sample))
+    legacy = (time.perf_counter() - start) * args.influencers / args.legacy_sample
+
+    start = time.perf_counter()
+    calculate_vibe_scores(calculate_vibe_inputs_from_frames(news, videos, votes))
+    vectorized = time.perf_counter() - start
+
+    print(f"{args.influencers} influencers, {args.comments} comments, {args.articles} articles")
+    print(f"per-influencer loop (extrapolated): {legacy:.2f}s")
+    print(f"groupby + vectorized:              {vectorized:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
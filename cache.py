@@ -0,0 +1,120 @@
+# in-process read cache for the hot API endpoints
+
+# import the required libraries
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TTLCache:
+    """
+    Size-limited LRU cache where every entry also expires after its TTL.
+
+    Entries are grouped by a tag (the table they were read from) so a write to a table
+    can drop every cached read of that table at once with invalidate(tag).
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=30.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, tag), oldest first
+        self._tags = {}  # tag -> set of keys
+        self._generations = {}  # tag -> number of times it was invalidated
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key):
+        _, _, tag = self._entries.pop(key)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def get(self, key):
+        # returns (found, value) so that None can be cached as a value too
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)  # mark as most recently used
+            self.hits += 1
+            return True, value
+
+    def generation(self, tag):
+        with self._lock:
+            return self._generations.get(tag, 0)
+
+    def set(self, key, value, tag=None, ttl=None, generation=None):
+        with self._lock:
+            # if the tag was invalidated while the value was being loaded, the value may already be stale
+            if generation is not None and generation != self._generations.get(tag, 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+            ttl = self.default_ttl if ttl is None else ttl
+            self._entries[key] = (value, time.monotonic() + ttl, tag)
+            self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, tag=None, ttl=None):
+        found, value = self.get(key)
+        if found:
+            return value
+        generation = self.generation(tag)
+        value = loader()
+        self.set(key, value, tag=tag, ttl=ttl, generation=generation)
+        return value
+
+    def invalidate(self, tag):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for tag in self._tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# shared cache used by database_api and invalidated by the background jobs
+read_cache = TTLCache(
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 1024)),
+    default_ttl=float(os.getenv('CACHE_TTL', 30)),
+)
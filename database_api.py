@@ -1,15 +1,46 @@
 # importing the required libraries
-from fastapi import FastAPI, HTTPException # fastapi library for creating the API
-from mysql.connector import connect, Error # mysql.connector library for connecting to the MySQL database
+from fastapi import FastAPI, HTTPException, Query, Response # fastapi library for creating the API
+from mysql.connector import Error # mysql.connector library for talking to the MySQL database
 import os
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from pymysql.err import IntegrityError
-import pymysql.cursors
-from fastapi import BackgroundTasks
-from vibescore import update_vibe_scores
-from sentiment_analysis import analyze_and_update_news, analyze_and_update_videos
+from db_pool import get_pool, PoolTimeout
+from cache import read_cache
+from vote_buffer import create_vote_buffer, upsert_votes
+from job_scheduler import JobScheduler
+from leaderboard import leaderboard
+
+# vibescore and sentiment_analysis pull in pandas, SQLAlchemy and TextBlob, so they are imported the
+# first time one of their background jobs runs instead of every time a uvicorn worker starts
+def update_vibe_scores(influencer_ids=None):
+    from vibescore import update_vibe_scores as run_update_vibe_scores, update_selected_vibe_scores
+    if influencer_ids is None:
+        run_update_vibe_scores()
+    else:
+        update_selected_vibe_scores(sorted(influencer_ids))
+
+def analyze_and_update_news():
+    from sentiment_analysis import analyze_and_update_news as run_analyze_and_update_news
+    run_analyze_and_update_news()
+
+def analyze_and_update_videos():
+    from sentiment_analysis import analyze_and_update_videos as run_analyze_and_update_videos
+    run_analyze_and_update_videos()
+
+# the background jobs run through the scheduler instead of BackgroundTasks: however many requests ask for
+# a job, at most one instance of it runs at a time and it starts at most once per interval
+jobs = JobScheduler()
+jobs.register("news_sentiment", analyze_and_update_news, min_interval=float(os.getenv('SENTIMENT_JOB_INTERVAL_MS', 10000)) / 1000)
+jobs.register("video_sentiment", analyze_and_update_videos, min_interval=float(os.getenv('SENTIMENT_JOB_INTERVAL_MS', 10000)) / 1000)
+jobs.register("vibe_scores", update_vibe_scores, min_interval=float(os.getenv('VIBE_JOB_INTERVAL_MS', 1000)) / 1000)
 
 class VoteCreate(BaseModel):
     influencer_id: int
@@ -36,24 +67,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After-Id"],  # lets the frontend read the pagination cursor
 )
 
-# function to connect to the mysql database
+# function to get a connection to the mysql database from the shared connection pool
+# connections are reused between requests instead of doing a new TCP + auth handshake every time
 def get_database_connection():
     try:
-        connection = connect(
-            host=os.getenv('DB_HOST'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASS'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
-    except Error as e:
+        return get_pool().checkout()
+    except (PoolTimeout, Error) as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+# function to give the connection back to the pool once the request is done with it
+def release_database_connection(connection):
+    get_pool().checkin(connection)
+
+# tables whose reads are served from the in-process cache. they are polled constantly by the frontend
+# but only change when a vote lands or a background job runs, and those writes invalidate the cache.
+CACHED_TABLES = {"Influencers", "Votes", "VibeScoreHistory"}
+
 # function to fetch all the tables that we already created in the database.
 def fetch_all_from_table(table_name):
+    if table_name in CACHED_TABLES:
+        return read_cache.get_or_load(("all", table_name), lambda: query_all_from_table(table_name), tag=table_name)
+    return query_all_from_table(table_name)
+
+def query_all_from_table(table_name):
     connection = get_database_connection()
     if connection is None:
         raise HTTPException(status_code=500, detail="Could not connect to the database error 500") # raise an exception if the connection is not established
@@ -67,30 +107,100 @@ def fetch_all_from_table(table_name):
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error fetching data from {table_name}: {e}")
     finally:
-        connection.close()
+        release_database_connection(connection)
 
-# API endpoint that returns the VibescoreHistory table
-@app.get("/VibeScoreHistory")
-async def get_vibe_score_history():
-    return fetch_all_from_table("VibeScoreHistory")
+# columns that can be requested with ?fields= for each paginated table.
+# the column names go straight into the SQL so only names from this list are accepted.
+TABLE_COLUMNS = {
+    "News": ["id", "influencer_id", "url", "title", "article", "sentiment_score"],
+    "Videos": ["id", "influencer_id", "url", "title", "comment", "sentiment_score"],
+    "Votes": ["id", "influencer_id", "good_vote", "bad_vote"],
+    "VibeScoreHistory": ["id", "influencer_id", "vibe_score", "recorded_at"],
+}
 
-# create the API endpoints to fetch the data from the tables
-@app.get("/Influencers") # endpoint to fetch the data from the influencers table
-async def get_influencers(): # async function to fetch the data, async is used to make the function asynchronous which is useful when we are fetching data from the database or making API requests
-    return fetch_all_from_table("Influencers") # async function was recommended by the LLM to make our API better as previously I was incountring some errors
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
-# this endpoint is used to fetch the data from th votes table based on the influencer_id and content_id
-# this function is useful when we want to fetch the data based on the influencer_id and content_id and based on that we want to update the votecount.
+# turn the comma separated ?fields= value into a list of columns, id is always included for the cursor
+def parse_fields(table_name, fields):
+    columns = TABLE_COLUMNS[table_name]
+    if not fields:
+        return columns
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields for {table_name}: {', '.join(unknown)}")
+    return ["id"] + [field for field in requested if field != "id"]
+
+# function to fetch one page of a table using keyset pagination (WHERE id > after_id ORDER BY id LIMIT n).
+# unlike OFFSET this stays an index range scan on the primary key (or on influencer_id when filtering)
+# no matter how deep the client pages.
+def fetch_page_from_table(table_name, limit=DEFAULT_PAGE_SIZE, after_id=None, fields=None, influencer_id=None):
+    columns = parse_fields(table_name, fields)
+    if table_name in CACHED_TABLES:
+        key = ("page", table_name, limit, after_id, tuple(columns), influencer_id)
+        return read_cache.get_or_load(key, lambda: query_page_from_table(table_name, columns, limit, after_id, influencer_id), tag=table_name)
+    return query_page_from_table(table_name, columns, limit, after_id, influencer_id)
+
+def query_page_from_table(table_name, columns, limit, after_id, influencer_id):
+    conditions = []
+    params = []
+    if influencer_id is not None:
+        conditions.append("influencer_id = %s")
+        params.append(influencer_id)
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {', '.join(columns)} FROM {table_name} {where} ORDER BY id LIMIT %s"
+    params.append(limit)
 
-@app.get("/Votes/{influencer_id}")
-async def get_vote(influencer_id: int):
+    connection = get_database_connection()
+    if connection is None:
+        raise HTTPException(status_code=500, detail="Could not connect to the database error 500")
+
+    try:
+        with connection.cursor(dictionary=True) as cursor:
+            cursor.execute(query, tuple(params))
+            return cursor.fetchall()
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching data from {table_name}: {e}")
+    finally:
+        release_database_connection(connection)
+
+# when the page is full there may be more rows, so tell the client where to continue from
+def set_next_page_header(response, rows, limit):
+    if len(rows) == limit:
+        response.headers["X-Next-After-Id"] = str(rows[-1]["id"])
+
+# the mysql drivers are blocking, so every query runs on a bounded thread pool instead of the event loop.
+# the pool has one thread per database connection, so a slow query only holds up its own request.
+_db_executor = None
+
+def get_db_executor():
+    global _db_executor
+    if _db_executor is None:
+        pool = get_pool()
+        _db_executor = ThreadPoolExecutor(max_workers=pool.pool_size + pool.max_overflow, thread_name_prefix="db")
+    return _db_executor
+
+# run a blocking database function on the db thread pool and wait for it without blocking the event loop
+async def run_db(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(func, *args))
+
+# function to fetch the vote row of one influencer
+def fetch_vote(influencer_id):
+    return read_cache.get_or_load(("vote", influencer_id), lambda: query_vote(influencer_id), tag="Votes")
+
+def query_vote(influencer_id):
     connection = get_database_connection()
     if connection is None:
         raise HTTPException(status_code=500, detail="Could not connect to the database")
 
     try:
-        # Use DictCursor to return results as dictionaries
-        with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+        # Use a dictionary cursor to return results as dictionaries
+        with connection.cursor(dictionary=True) as cursor:
             # Pass influencer_id as a tuple (influencer_id,)
             cursor.execute(
                 "SELECT * FROM Votes WHERE influencer_id = %s",
@@ -101,92 +211,268 @@ async def get_vote(influencer_id: int):
                 # Return a 404 error if no vote is found
                 raise HTTPException(status_code=404, detail="Vote not found")
             return vote
-    except pymysql.MySQLError as e:
+    except Error as e:
         raise HTTPException(status_code=500, detail=f"Error fetching vote: {e}")
     finally:
-        connection.close()
-
+        release_database_connection(connection)
 
-@app.get("/News") # endpoint to fetch the data from the content table
-async def get_content(background_tasks: BackgroundTasks):
-    # Run sentiment analysis in the background
-    background_tasks.add_task(analyze_and_update_news)
-    return fetch_all_from_table("News")
-
-@app.get("/Videos") # endpoint to fetch the data from the comments table
-async def get_comments(background_tasks: BackgroundTasks):
-    # Run sentiment analysis in the background
-    background_tasks.add_task(analyze_and_update_videos)
-    return fetch_all_from_table("Videos")
+# function to add a vote straight to the votes table.
+# the upsert adds to the existing row (Votes.influencer_id is unique) or creates it, in one atomic statement
+def insert_vote(influencer_id, good_vote, bad_vote):
+    try:
+        upsert_votes([(influencer_id, good_vote, bad_vote)])
+    except PoolTimeout:
+        raise HTTPException(status_code=500, detail="Could not connect to the database")
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error inserting vote: {e}")
+    read_cache.invalidate("Votes")
 
-@app.get("/Votes") # endpoint to fetch the data from the votes table
-async def get_votes():
-    return fetch_all_from_table("Votes")
+# called by the vote buffer after it wrote a batch of votes
+def on_votes_flushed(influencer_ids):
+    read_cache.invalidate("Votes")
+    # only the influencers that received votes need a new vibe score
+    jobs.schedule("vibe_scores", influencer_ids)
 
+# votes from PUT /Votes/{influencer_id} are summed per influencer in memory and written in batches,
+# see vote_buffer.py for the flush interval / size settings
+vote_buffer = create_vote_buffer(on_flush=on_votes_flushed)
 
-# create the API endpoint to add a new vote to the votes table
-@app.post("/Votes", status_code=201)  # Status code 201 indicates resource creation
-async def create_vote(vote: VoteCreate):
+def query_influencer_ids(influencer_id=None):
+    # every influencer id, or just the given one if it exists
     connection = get_database_connection()
     if connection is None:
         raise HTTPException(status_code=500, detail="Could not connect to the database")
-
     try:
         with connection.cursor() as cursor:
-            cursor.execute(
-                "INSERT INTO Votes (influencer_id, good_vote, bad_vote) VALUES (%s, %s, %s)", # SQL query to insert the vote into the votes table
-                (vote.influencer_id, vote.good_vote, vote.bad_vote) # values to be inserted into the table
-            )
-            connection.commit()
-            return {"message": "Vote added successfully"}
+            if influencer_id is None:
+                cursor.execute("SELECT id FROM Influencers")
+            else:
+                cursor.execute("SELECT id FROM Influencers WHERE id = %s", (influencer_id,))
+            return {row[0] for row in cursor.fetchall()}
     except Error as e:
-        raise HTTPException(status_code=500, detail=f"Error inserting vote: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching influencers: {e}")
     finally:
-        connection.close()
+        release_database_connection(connection)
+
+# votes are only buffered for influencers that exist: a vote for an unknown id would break the foreign key
+# of the whole batch insert. the ids are cached with the Influencers table, an id that isn't in the cached
+# set (maybe added since it was loaded) is looked up on its own
+def influencer_exists(influencer_id):
+    if influencer_id in read_cache.get_or_load(("influencer_ids",), query_influencer_ids, tag="Influencers"):
+        return True
+    return influencer_id in query_influencer_ids(influencer_id)
+
+# function to add votes to an influencer through the vote buffer
+def add_to_vote(influencer_id, good_vote, bad_vote):
+    if not influencer_exists(influencer_id):
+        raise HTTPException(status_code=404, detail="Influencer not found")
+    try:
+        vote_buffer.add(influencer_id, good_vote, bad_vote)
+    except (PoolTimeout, Error) as e:
+        raise HTTPException(status_code=500, detail=f"Error updating or creating vote: {e}")
+
+# API endpoint that returns the VibescoreHistory table
+# all the list endpoints below take the same paging parameters:
+# limit (page size), after_id (id of the last row of the previous page), fields (comma separated columns)
+# and influencer_id (only rows of that influencer)
+@app.get("/VibeScoreHistory")
+async def get_vibe_score_history(response: Response,
+                                 limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                 after_id: Optional[int] = None,
+                                 fields: Optional[str] = None,
+                                 influencer_id: Optional[int] = None):
+    rows = await run_db(fetch_page_from_table, "VibeScoreHistory", limit, after_id, fields, influencer_id)
+    set_next_page_header(response, rows, limit)
+    return rows
+
+# history buckets for /VibeScoreHistory/{influencer_id}: the DATE_FORMAT pattern that truncates recorded_at
+# to the start of its bucket, the bucket length, and the range returned when ?from= is left out
+HISTORY_BUCKETS = {
+    "1h": ("%Y-%m-%d %H:00:00", timedelta(hours=1), timedelta(days=7)),
+    "1d": ("%Y-%m-%d 00:00:00", timedelta(days=1), timedelta(days=90)),
+}
+MAX_HISTORY_POINTS = 1000
+
+# one point per bucket with the min / max / avg / last vibe score recorded in it.
+# the WHERE clause is a range scan on the (influencer_id, recorded_at) index, so the cost depends on the
+# requested range and not on how much history is stored, and the response has at most MAX_HISTORY_POINTS points
+HISTORY_QUERY = """
+SELECT DATE_FORMAT(recorded_at, %s) AS bucket,
+       MIN(vibe_score) AS min,
+       MAX(vibe_score) AS max,
+       AVG(vibe_score) AS avg,
+       CAST(SUBSTRING_INDEX(GROUP_CONCAT(vibe_score ORDER BY recorded_at DESC, id DESC), ',', 1) AS DECIMAL(5, 2)) AS last,
+       COUNT(*) AS count
+FROM VibeScoreHistory
+WHERE influencer_id = %s AND recorded_at >= %s AND recorded_at < %s
+GROUP BY bucket
+ORDER BY bucket
+"""
+
+def fetch_vibe_score_history(influencer_id, start, end, bucket):
+    key = ("history", influencer_id, start, end, bucket)
+    return read_cache.get_or_load(key, lambda: query_vibe_score_history(influencer_id, start, end, bucket), tag="VibeScoreHistory")
+
+# recorded_at is a DATETIME filled in with CURRENT_TIMESTAMP, so it holds the MySQL session's local time, which
+# doesn't have to be the API host's. times with a timezone are converted through UTC with the database's current
+# UTC offset, times without one are taken as database time as they are
+def to_database_time(value, utc_offset):
+    if value is None or value.tzinfo is None:
+        return value
+    return (value.astimezone(timezone.utc) + timedelta(seconds=utc_offset)).replace(tzinfo=None)
+
+def query_vibe_score_history(influencer_id, start, end, bucket):
+    if bucket not in HISTORY_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Unknown bucket {bucket}, use one of: {', '.join(HISTORY_BUCKETS)}")
+    date_format, bucket_size, default_range = HISTORY_BUCKETS[bucket]
 
-# create the API endpoint to update the vote in the votes table
-@app.put("/Votes/{influencer_id}") # endpoint to update the vote in the votes table based on the influencer_id
-async def update_or_create_vote(influencer_id: int, vote_data: VoteUpdate, background_tasks: BackgroundTasks):
     connection = get_database_connection()
     if connection is None:
         raise HTTPException(status_code=500, detail="Could not connect to the database")
 
     try:
-        with connection.cursor(pymysql.cursors.DictCursor) as cursor:
-            # Check if a vote entry exists for the given influencer_id
-            cursor.execute("SELECT * FROM Votes WHERE influencer_id = %s", (influencer_id,))
-            existing_vote = cursor.fetchone()
-
-            if existing_vote:
-                # If vote exists, update the good_vote and bad_vote
-                cursor.execute(
-                    """
-                    UPDATE Votes
-                    SET good_vote = good_vote + %s, bad_vote = bad_vote + %s
-                    WHERE influencer_id = %s
-                    """,
-                    (vote_data.good_vote, vote_data.bad_vote, influencer_id)
-                )
-                connection.commit()
-                # Run vibe score update in the background
-                background_tasks.add_task(update_vibe_scores)
-                return {"message": "Vote updated successfully"}
-            else:
-                # If vote does not exist, insert a new row
-                cursor.execute(
-                    """
-                    INSERT INTO Votes (influencer_id, good_vote, bad_vote)
-                    VALUES (%s, %s, %s)
-                    """,
-                    (influencer_id, vote_data.good_vote, vote_data.bad_vote)
-                )
-                connection.commit()
-                # Run vibe score update in the background
-                background_tasks.add_task(update_vibe_scores)
-                return {"message": "Vote created successfully"}
-    except pymysql.MySQLError as e:
-        raise HTTPException(status_code=500, detail=f"Error updating or creating vote: {e}")
+        with connection.cursor(dictionary=True) as cursor:
+            # "now" and the UTC offset come from the database, not from the API host's clock and zone
+            cursor.execute("SELECT NOW() AS now, TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) AS utc_offset")
+            clock = cursor.fetchone()
+            start, end = (to_database_time(value, clock["utc_offset"]) for value in (start, end))
+            end = end or clock["now"]
+            start = start or end - default_range
+            if start >= end:
+                raise HTTPException(status_code=400, detail="from must be before to")
+            if (end - start) / bucket_size > MAX_HISTORY_POINTS:
+                raise HTTPException(status_code=400, detail=f"Range too long for bucket {bucket}, at most {MAX_HISTORY_POINTS} points are returned")
+            cursor.execute(HISTORY_QUERY, (date_format, influencer_id, start, end))
+            return cursor.fetchall()
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching vibe score history: {e}")
     finally:
-        connection.close()
+        release_database_connection(connection)
+
+# vibe score history of one influencer for charts: ?from= and ?to= (ISO datetimes, to defaults to the database's now)
+# and ?bucket=1h or 1d. returns one aggregated point per bucket instead of every stored row
+@app.get("/VibeScoreHistory/{influencer_id}")
+async def get_influencer_vibe_score_history(influencer_id: int,
+                                            start: Optional[datetime] = Query(None, alias="from"),
+                                            end: Optional[datetime] = Query(None, alias="to"),
+                                            bucket: str = "1d"):
+    return await run_db(fetch_vibe_score_history, influencer_id, start, end, bucket)
+
+# create the API endpoints to fetch the data from the tables
+@app.get("/Influencers") # endpoint to fetch the data from the influencers table
+async def get_influencers(): # async function to fetch the data, async is used to make the function asynchronous which is useful when we are fetching data from the database or making API requests
+    return await run_db(fetch_all_from_table, "Influencers") # the query itself runs on the db thread pool so the event loop stays free
+
+# (re)loads every influencer into the leaderboard: the first time, after new influencers showed up and once
+# the last load is older than LEADERBOARD_MAX_AGE, so scores written by other processes show up too.
+# one load at a time, a caller that waited for it finds the leaderboard fresh and skips its own
+_leaderboard_load_lock = threading.Lock()
+
+def load_leaderboard():
+    with _leaderboard_load_lock:
+        if leaderboard.needs_reload():
+            leaderboard.reload(lambda: query_all_from_table("Influencers"))
+
+# after the first load the refreshes run as a background job, requests keep getting the ranking in memory
+# (also while MySQL is down, a failed refresh is retried at most every LEADERBOARD_REFRESH_INTERVAL_MS)
+jobs.register("leaderboard", load_leaderboard, min_interval=float(os.getenv('LEADERBOARD_REFRESH_INTERVAL_MS', 5000)) / 1000)
+
+# ranking by vibe score: k influencers with the highest (order=desc) or lowest (order=asc) score.
+# served from the in-memory leaderboard, which the vibe score jobs update whenever they write new scores
+@app.get("/Influencers/top")
+async def get_top_influencers(k: int = Query(10, ge=1, le=MAX_PAGE_SIZE), order: str = "desc"):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    if not leaderboard.loaded:
+        await run_db(load_leaderboard)  # nothing to serve yet, only the first load is waited for
+    elif leaderboard.needs_reload():
+        jobs.schedule("leaderboard")
+    return leaderboard.top(k, order)
+
+# this endpoint is used to fetch the data from th votes table based on the influencer_id and content_id
+# this function is useful when we want to fetch the data based on the influencer_id and content_id and based on that we want to update the votecount.
+
+@app.get("/Votes/{influencer_id}")
+async def get_vote(influencer_id: int):
+    return await run_db(fetch_vote, influencer_id)
+
+
+@app.get("/News") # endpoint to fetch the data from the content table
+async def get_content(response: Response,
+                      limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                      after_id: Optional[int] = None,
+                      fields: Optional[str] = None,
+                      influencer_id: Optional[int] = None):
+    # Run sentiment analysis in the background
+    jobs.schedule("news_sentiment")
+    rows = await run_db(fetch_page_from_table, "News", limit, after_id, fields, influencer_id)
+    set_next_page_header(response, rows, limit)
+    return rows
+
+@app.get("/Videos") # endpoint to fetch the data from the comments table
+async def get_comments(response: Response,
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       after_id: Optional[int] = None,
+                       fields: Optional[str] = None,
+                       influencer_id: Optional[int] = None):
+    # Run sentiment analysis in the background
+    jobs.schedule("video_sentiment")
+    rows = await run_db(fetch_page_from_table, "Videos", limit, after_id, fields, influencer_id)
+    set_next_page_header(response, rows, limit)
+    return rows
+
+@app.get("/Votes") # endpoint to fetch the data from the votes table
+async def get_votes(response: Response,
+                    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                    after_id: Optional[int] = None,
+                    fields: Optional[str] = None,
+                    influencer_id: Optional[int] = None):
+    rows = await run_db(fetch_page_from_table, "Votes", limit, after_id, fields, influencer_id)
+    set_next_page_header(response, rows, limit)
+    return rows
+
+
+# create the API endpoint to add a new vote to the votes table
+@app.post("/Votes", status_code=201)  # Status code 201 indicates resource creation
+async def create_vote(vote: VoteCreate):
+    await run_db(insert_vote, vote.influencer_id, vote.good_vote, vote.bad_vote)
+    return {"message": "Vote added successfully"}
+
+# create the API endpoint to update the vote in the votes table
+@app.put("/Votes/{influencer_id}") # endpoint to update the vote in the votes table based on the influencer_id
+async def update_or_create_vote(influencer_id: int, vote_data: VoteUpdate):
+    # the vote is buffered and written with the next flush, which also recomputes this influencer's vibe score
+    await run_db(add_to_vote, influencer_id, vote_data.good_vote, vote_data.bad_vote)
+    return {"message": "Vote recorded successfully"}
+
+# write the votes that are still buffered before the worker exits
+@app.on_event("shutdown")
+def flush_votes_on_shutdown():
+    vote_buffer.close()
+    jobs.close()
+
+
+# endpoint to check the state of the connection pool (in use, waiting, timeouts, ...)
+@app.get("/stats/pool")
+async def get_pool_stats():
+    return get_pool().stats()
+
+# endpoint to check how well the read cache is doing (hits, misses, evictions, ...)
+@app.get("/stats/cache")
+async def get_cache_stats():
+    return read_cache.stats()
+
+# endpoint to check the vote buffer (pending votes, flush latency, ...)
+@app.get("/stats/votes")
+async def get_vote_buffer_stats():
+    return vote_buffer.stats()
 
+# endpoint to check the in-memory leaderboard (loaded, last load, reloads, score updates, ...)
+@app.get("/stats/leaderboard")
+async def get_leaderboard_stats():
+    return leaderboard.stats()
 
+# endpoint to check the background jobs (queue depth, last run duration, ...)
+@app.get("/stats/jobs")
+async def get_job_stats():
+    return jobs.stats()
@@ -0,0 +1,231 @@
+# process-wide MySQL connection pool used by the API endpoints,
+# plus the shared SQLAlchemy engine used by the vibe score and sentiment analysis jobs
+
+# import the required libraries
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from mysql.connector import connect, Error
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of mysql.connector connections.
+
+    - pool_size: number of connections kept open between requests
+    - max_overflow: extra connections allowed during bursts, closed when returned
+    - timeout: seconds a caller waits for a free connection before PoolTimeout
+    - recycle: seconds after which an idle connection is closed and reopened
+    - pre_ping: check the connection is still alive before handing it out
+    """
+
+    def __init__(self, connect_args, pool_size=5, max_overflow=10, timeout=30.0, recycle=3600, pre_ping=True):
+        self.connect_args = connect_args
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()  # (connection, created_at) pairs ready to be reused
+        self._created_at = {}  # id(connection) -> creation time, for recycling
+        self._lock = threading.Condition()
+        self._open = 0  # connections currently open (idle + in use)
+        self._in_use = 0
+        self._waiting = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+
+    def _new_connection(self):
+        connection = connect(**self.connect_args)
+        with self._lock:
+            self._created_at[id(connection)] = time.monotonic()
+            self._created += 1
+        return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _is_usable(self, connection, created_at):
+        # drop connections that are older than the recycle window or fail the health check
+        if self.recycle is not None and self.recycle >= 0 and time.monotonic() - created_at > self.recycle:
+            with self._lock:
+                self._recycled += 1
+            return False
+        if self.pre_ping:
+            try:
+                connection.ping(reconnect=False)
+            except Error:
+                return False
+        return True
+
+    def checkout(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            candidate = None
+            with self._lock:
+                while not self._idle and self._open >= self.pool_size + self.max_overflow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                    self._waiting += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    # reserve the slot before connecting so concurrent callers respect the bound
+                    self._open += 1
+                self._in_use += 1
+
+            if candidate is not None:
+                # health checks run outside the lock so they don't block other callers
+                connection, created_at = candidate
+                if self._is_usable(connection, created_at):
+                    return connection
+                self._discard(connection)
+                with self._lock:
+                    self._open -= 1
+                    self._in_use -= 1
+                continue
+
+            # open the connection outside the lock, the handshake is the slow part
+            try:
+                return self._new_connection()
+            except Exception:
+                with self._lock:
+                    self._open -= 1
+                    self._in_use -= 1
+                    self._lock.notify()
+                raise
+
+    def checkin(self, connection, broken=False):
+        if not broken:
+            try:
+                # make sure no transaction leaks into the next request
+                connection.rollback()
+            except Error:
+                broken = True
+        with self._lock:
+            self._in_use -= 1
+            if broken or len(self._idle) >= self.pool_size:
+                # overflow connections (and broken ones) are closed instead of kept
+                self._discard(connection)
+                self._open -= 1
+            else:
+                self._idle.append((connection, self._created_at.get(id(connection), time.monotonic())))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        connection = self.checkout()
+        broken = False
+        try:
+            yield connection
+        except Error:
+            broken = not connection.is_connected()
+            raise
+        finally:
+            self.checkin(connection, broken=broken)
+
+    def dispose(self):
+        # close every idle connection, in-use ones are closed when returned
+        with self._lock:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+                self._open -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # the pool is created on first use and shared by every request in the process
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    connect_args=dict(
+                        host=os.getenv('DB_HOST'),
+                        user=os.getenv('DB_USER'),
+                        password=os.getenv('DB_PASS'),
+                        database=os.getenv('DB_NAME'),
+                    ),
+                    pool_size=int(os.getenv('DB_POOL_SIZE', 5)),
+                    max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+                    recycle=int(os.getenv('DB_POOL_RECYCLE', 3600)),
+                    pre_ping=os.getenv('DB_POOL_PRE_PING', '1') != '0',
+                )
+    return _pool
+
+
+_engine = None
+_tables = {}
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    # created on first use, so importing a module that needs the database doesn't touch it.
+    # SQLAlchemy itself is imported here too, the API only needs it once a background job runs
+    import sqlalchemy
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = sqlalchemy.create_engine(
+                    f'mysql+pymysql://{os.getenv("DB_USER")}:{os.getenv("DB_PASS")}@{os.getenv("DB_HOST")}/{os.getenv("DB_NAME")}',
+                    pool_pre_ping=True,
+                    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 3600)),
+                )
+    return _engine
+
+
+def get_table(table_name):
+    # reflect a table once per process and share it, instead of reflecting the whole schema every time
+    from sqlalchemy import MetaData, Table
+    table = _tables.get(table_name)
+    if table is None:
+        # the engine first: get_engine takes _engine_lock itself, and that lock isn't reentrant
+        engine = get_engine()
+        with _engine_lock:
+            table = _tables.get(table_name)
+            if table is None:
+                table = Table(table_name, MetaData(), autoload_with=engine)
+                _tables[table_name] = table
+    return table
@@ -0,0 +1,195 @@
+# bulk ingestion helpers shared by the CSV / Parquet loaders in main.py and the scrape pipeline (pipeline.py):
+# lookups are done once per load (or per chunk) instead of once per row, and rows are inserted in batches with executemany
+
+# import the required libraries
+import hashlib
+import os
+import time
+import mysql.connector
+import pandas as pd
+from dotenv import load_dotenv
+from mysql.connector import Error
+
+load_dotenv()
+
+# rows per executemany call, each batch is committed on its own
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 1000))
+# rows read from a CSV at a time, memory use depends on this and not on the size of the file
+INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 50000))
+
+
+def fetch_influencer_ids(cursor):
+    # name -> id map of every influencer, replaces a SELECT per row
+    cursor.execute("SELECT name, id FROM Influencers")
+    return {name: influencer_id for name, influencer_id in cursor.fetchall()}
+
+
+def fetch_existing_hashes(cursor, table_name, column_name, hashes, batch_size=INGEST_BATCH_SIZE):
+    # which of the given hashes are already stored, looked up through the unique hash index.
+    # only the hashes of the current chunk are asked for, so this doesn't grow with the table
+    hashes = list(hashes)
+    existing = set()
+    for start in range(0, len(hashes), batch_size):
+        batch = hashes[start:start + batch_size]
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"SELECT {column_name} FROM {table_name} WHERE {column_name} IN ({placeholders})", batch)
+        existing.update(value for (value,) in cursor.fetchall())
+    return existing
+
+
+def iter_chunks(data):
+    # the loaders take a whole DataFrame or an iterator of DataFrames (pd.read_csv(..., chunksize=...))
+    if isinstance(data, pd.DataFrame):
+        return [data]
+    return data
+
+
+def valid_rows(chunk, required_columns):
+    """
+    Drops the rows of a chunk that miss one of the required values and turns the remaining NaN into None
+    (so they are stored as NULL). Returns the cleaned chunk and the number of rows dropped.
+    """
+    cleaned = chunk.dropna(subset=required_columns)
+    cleaned = cleaned.astype(object).where(cleaned.notna(), None)
+    return cleaned, len(chunk) - len(cleaned)
+
+
+def sha1_key(*parts):
+    # same value as the url_hash / comment_hash columns compute in MySQL: SHA1(CONCAT_WS('\n', ...))
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def insert_in_batches(connection, query, rows, batch_size=INGEST_BATCH_SIZE):
+    """
+    Inserts rows with executemany (sent as multi-row INSERT statements) and commits after every batch,
+    so a failure half way keeps the batches that were already written.
+    Returns the number of rows inserted (rows skipped by INSERT IGNORE don't count).
+    """
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.executemany(query, batch)
+            connection.commit()
+            inserted += max(cursor.rowcount, 0)
+    return inserted
+
+
+# the function can either connect with or without specifying a database
+def create_connection(with_database=True):
+    connection = None
+    try:
+        # print connection details for debugging purposes
+        # print(f"Attempting to connect to:")
+        # print(f"Host: {os.getenv('DB_HOST')}")
+        # print(f"User: {os.getenv('DB_USER')}")
+        # if with_database:
+        #     print(f"Database: {os.getenv('DB_NAME')}")
+
+        # establish connection to the database
+        if with_database:
+            # if the database is already created, connect with it
+            connection = mysql.connector.connect(
+                host=os.getenv('DB_HOST'),
+                user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASS'),
+                database=os.getenv('DB_NAME')
+            )
+        else:
+            # when creating the database - without specifying
+            connection = mysql.connector.connect(
+                host=os.getenv('DB_HOST'),
+                user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASS')
+            )
+        # debug message
+        # print("Successfully connected to the database")
+    except Error as e:
+        print(f"Error connecting to MySQL: {e}")
+    return connection
+
+
+# some names in youtube channels are different from our database
+YOUTUBE_NAME_MAPPING = {
+    'Diddy': 'P Diddy',
+    'The Rock': 'Dwayne Johnson',
+    'CaseyNeistat': 'Casey Neistat',
+    'PowerfulJRE': 'Joe Rogan',
+    'Kai Cenat Live': 'Kai Cenat'
+}
+
+# INSERT IGNORE skips comments / articles the unique comment_hash / url_hash keys already have
+INSERT_VIDEOS_QUERY = """
+INSERT IGNORE INTO Videos (influencer_id, url, title, comment, sentiment_score)
+VALUES (%s, %s, %s, %s, %s)
+"""
+INSERT_NEWS_QUERY = """
+INSERT IGNORE INTO News (influencer_id, url, title, article, sentiment_score)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+# turn a chunk of YouTube rows into Videos rows: validation, name mapping and influencer lookup.
+# returns the rows as comment_hash -> row and the number of invalid rows dropped, unknown names go into missing_names
+def prepare_video_rows(chunk, influencer_ids, missing_names):
+    chunk, dropped = valid_rows(chunk, ['Name', 'URL', 'comment'])
+    # apply the name mapping (without changing the caller's DataFrame)
+    names = chunk['Name'].replace(YOUTUBE_NAME_MAPPING)
+    rows = {}
+    for name, url, title, comment in zip(names, chunk['URL'], chunk['Title'], chunk['comment']):
+        # find influencer_id using the mapped name
+        influencer_id = influencer_ids.get(name)
+        if influencer_id is None:
+            missing_names.add(name)
+            continue
+        # the first copy of a comment repeated in the chunk wins
+        rows.setdefault(sha1_key(url, comment), (influencer_id, url, title, comment, None))   # no sentiment score yet
+    return rows, dropped
+
+
+# write prepared Videos rows, skipping the comments that are already stored. returns the number of rows inserted
+def write_video_rows(connection, rows):
+    with connection.cursor() as cursor:
+        existing_videos = fetch_existing_hashes(cursor, "Videos", "comment_hash", rows)
+    new_rows = [row for comment_hash, row in rows.items() if comment_hash not in existing_videos]
+    return insert_in_batches(connection, INSERT_VIDEOS_QUERY, new_rows)
+
+
+# same as prepare_video_rows for a chunk of TMZ articles, keyed by url_hash
+def prepare_news_rows(chunk, influencer_ids, missing_names):
+    chunk, dropped = valid_rows(chunk, ['Celebrity', 'URL', 'Content'])
+    rows = {}
+    for celebrity, title, url, content in zip(chunk['Celebrity'], chunk['Title'], chunk['URL'], chunk['Content']):
+        # find influencer_id using the celebrity name
+        influencer_id = influencer_ids.get(celebrity)
+        if influencer_id is None:
+            missing_names.add(celebrity)
+            continue
+        rows.setdefault(sha1_key(url), (influencer_id, url, title, content, None))         # no sentiment score available yet
+    return rows, dropped
+
+
+def write_news_rows(connection, rows):
+    with connection.cursor() as cursor:
+        existing_urls = fetch_existing_hashes(cursor, "News", "url_hash", rows)
+    new_rows = [row for url_hash, row in rows.items() if url_hash not in existing_urls]
+    return insert_in_batches(connection, INSERT_NEWS_QUERY, new_rows)
+
+
+class IngestTimer:
+    """Times one load and prints rows/second when it is done."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            elapsed = time.perf_counter() - self.start
+            rate = self.rows / elapsed if elapsed > 0 else 0
+            print(f"{self.name}: {self.rows} rows inserted in {elapsed:.2f}s ({rate:.0f} rows/s)")
+        return False
@@ -0,0 +1,124 @@
+# single-flight, debounced scheduler for the background recompute jobs (sentiment analysis, vibe scores)
+
+# import the required libraries
+import threading
+import time
+
+
+class _Job:
+    def __init__(self, kind, func, min_interval):
+        self.kind = kind
+        self.func = func
+        self.min_interval = min_interval
+        self.pending = False
+        self.pending_keys = set()
+        self.full_run = False  # someone asked for a run without keys, so the run covers everything
+        self.running = False
+        self.requests = 0
+        self.collapsed = 0
+        self.runs = 0
+        self.failures = 0
+        self.last_started = None
+        self.last_duration_ms = None
+        self.last_error = None
+        self.thread = None
+
+
+class JobScheduler:
+    """
+    Runs each kind of background job on its own worker thread, so at most one instance of a job runs at a time.
+
+    schedule(kind) only marks the job as pending: any number of requests that arrive before it starts are
+    collapsed into one run, and a job starts at most once every min_interval seconds (debouncing bursts).
+    Requests that arrive while the job is running cause exactly one more run afterwards.
+    Jobs can be scheduled with keys (e.g. influencer ids); the keys of collapsed requests are merged and
+    passed to the job as a set. A request without keys makes the next run a full run, called without arguments.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Condition()
+        self._stopped = False
+
+    def register(self, kind, func, min_interval=0.0):
+        with self._lock:
+            self._jobs[kind] = _Job(kind, func, min_interval)
+
+    def schedule(self, kind, keys=None):
+        with self._lock:
+            job = self._jobs[kind]
+            job.requests += 1
+            if job.pending:
+                job.collapsed += 1
+            job.pending = True
+            if keys is None:
+                job.full_run = True
+            else:
+                job.pending_keys.update(keys)
+            if job.thread is None:
+                job.thread = threading.Thread(target=self._run, args=(job,), name=f"job-{kind}", daemon=True)
+                job.thread.start()
+            self._lock.notify_all()
+
+    def _run(self, job):
+        while True:
+            with self._lock:
+                while not job.pending and not self._stopped:
+                    self._lock.wait()
+                if self._stopped:
+                    return
+                # debounce: wait until min_interval has passed since the last run started
+                if job.last_started is not None:
+                    delay = job.last_started + job.min_interval - time.monotonic()
+                    if delay > 0:
+                        self._lock.wait(delay)
+                        continue
+                keys = None if job.full_run else set(job.pending_keys)
+                job.pending = False
+                job.full_run = False
+                job.pending_keys = set()
+                job.running = True
+                job.last_started = time.monotonic()
+
+            start = time.perf_counter()
+            error = None
+            try:
+                if keys is None:
+                    job.func()
+                else:
+                    job.func(keys)
+            except Exception as e:
+                error = e
+                print(f"Error running background job {job.kind}: {e}")
+
+            with self._lock:
+                job.running = False
+                job.runs += 1
+                job.last_duration_ms = (time.perf_counter() - start) * 1000
+                if error is not None:
+                    job.failures += 1
+                    job.last_error = str(error)
+
+    def close(self):
+        # stop the worker threads, a job that is running right now is allowed to finish
+        with self._lock:
+            self._stopped = True
+            self._lock.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                kind: {
+                    "queue_depth": int(job.pending),
+                    "pending_keys": len(job.pending_keys),
+                    "running": job.running,
+                    "requests": job.requests,
+                    "collapsed": job.collapsed,
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "last_duration_ms": job.last_duration_ms,
+                    "last_error": job.last_error,
+                    "min_interval_ms": job.min_interval * 1000,
+                }
+                for kind, job in self._jobs.items()
+            }
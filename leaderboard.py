@@ -0,0 +1,115 @@
+# in-memory vibe score ranking behind GET /Influencers/top
+
+# import the required libraries
+import bisect
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Leaderboard:
+    """
+    Influencer rows kept in a list sorted by (vibe_score, id), so the top or bottom k is a slice.
+
+    replace() loads every influencer from the database, update_scores() moves the influencers whose score
+    changed in this process to their new place. Reading the ranking never touches the database.
+    Scores written by other processes (python vibescore.py, ingestion runs) only show up with a reload, so
+    needs_reload() is True once the last load is older than max_age seconds. It is also True if a score arrives
+    for an influencer that isn't loaded yet (added after the load). The loaded ranking keeps being served
+    until the reload is done.
+    reload() replays the scores that arrive while it reads the database, so the rows it read can't
+    overwrite newer scores.
+    """
+
+    def __init__(self, max_age=30):
+        self.max_age = max_age
+        self._rows = {}  # influencer id -> row, as returned by /Influencers
+        self._ranking = []  # sorted (vibe_score, id)
+        self._pending = None  # scores written during a reload, id -> score
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.stale = False  # a score arrived for an influencer that isn't loaded
+        self.loaded_at = None
+        self.reloads = 0
+        self.updates = 0
+        self.last_update = None
+
+    def needs_reload(self):
+        with self._lock:
+            return not self.loaded or self.stale or time.time() - self.loaded_at > self.max_age
+
+    def reload(self, load_rows):
+        # load_rows() reads every influencer, it runs outside the lock so rankings are served meanwhile
+        with self._lock:
+            self._pending = {}
+        try:
+            rows = load_rows()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        self.replace(rows)
+
+    @staticmethod
+    def _key(row):
+        return (float(row["vibe_score"] or 0), row["id"])
+
+    def replace(self, rows):
+        with self._lock:
+            self._rows = {row["id"]: dict(row) for row in rows}
+            pending, self._pending = self._pending or {}, None
+            for influencer_id, score in pending.items():
+                if influencer_id in self._rows:
+                    self._rows[influencer_id]["vibe_score"] = score
+            self._ranking = sorted(self._key(row) for row in self._rows.values())
+            self.loaded = True
+            self.stale = False
+            self.reloads += 1
+            self.loaded_at = self.last_update = time.time()
+
+    def update_scores(self, scores):
+        # scores maps influencer id -> new vibe score, each move is a binary search plus a list insert
+        with self._lock:
+            if self._pending is not None:
+                self._pending.update(scores)
+            if not self.loaded:
+                return
+            for influencer_id, score in scores.items():
+                row = self._rows.get(influencer_id)
+                if row is None:
+                    self.stale = True
+                    continue
+                old_key = self._key(row)
+                del self._ranking[bisect.bisect_left(self._ranking, old_key)]
+                row["vibe_score"] = score
+                bisect.insort(self._ranking, self._key(row))
+            self.updates += 1
+            self.last_update = time.time()
+
+    def top(self, k, order="desc"):
+        # O(k): slice the end (highest scores) or the start (lowest scores) of the sorted list
+        with self._lock:
+            if order == "desc":
+                keys = self._ranking[:-k - 1:-1]
+            else:
+                keys = self._ranking[:k]
+            return [dict(self._rows[influencer_id]) for _, influencer_id in keys]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "stale": self.stale,
+                "loaded_at": self.loaded_at,
+                "max_age": self.max_age,
+                "influencers": len(self._ranking),
+                "reloads": self.reloads,
+                "updates": self.updates,
+                "last_update": self.last_update,
+            }
+
+
+leaderboard = Leaderboard(max_age=float(os.getenv('LEADERBOARD_MAX_AGE', os.getenv('CACHE_TTL', 30))))
@@ -1,50 +1,15 @@
 import os
 from dotenv import load_dotenv
-import mysql.connector
 from mysql.connector import Error
 import pandas as pd
 import time
-
-#import the scraper modules
-from scraping.tmz_scraper import main as tmz_scraper_main
-from scraping.youtube_scraper import main as youtube_scraper_main
+from ingest import (create_connection, fetch_influencer_ids, iter_chunks, insert_in_batches, prepare_news_rows,
+                    prepare_video_rows, write_news_rows, write_video_rows, IngestTimer, INGEST_CHUNK_SIZE)
+from scraping.parquet_store import use_parquet, list_partitions, read_partition, TMZ_PARQUET_DIR, TMZ_COLUMNS, YT_PARQUET_DIR, YT_COLUMNS
 
 #load variables from the .env file
 load_dotenv()
 
-#the function can either connect with or without specifying a database
-def create_connection(with_database=True):
-    connection = None
-    try:
-        #print connection details for debugging purposes
-        #print(f"Attempting to connect to:")
-        #print(f"Host: {os.getenv('DB_HOST')}")
-        #print(f"User: {os.getenv('DB_USER')}")
-        # if with_database:
-        #     print(f"Database: {os.getenv('DB_NAME')}")
-
-        #establish connection to the database
-        if with_database:
-            #if the database is already created, connect with it
-            connection = mysql.connector.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASS'),
-                database=os.getenv('DB_NAME')
-            )
-        else:
-            #when creating the database - without specifying
-            connection = mysql.connector.connect(
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASS')
-            )
-        #debug message
-        # print("Successfully connected to the database")
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-    return connection
-
 #create the database if it doesn't already exist
 def create_database(connection):
     print("Creating database...")
@@ -90,6 +55,13 @@ def create_news_table(connection):
         title VARCHAR(255),
         article TEXT NOT NULL,
         sentiment_score INT,
+        sentiment_hash CHAR(40),
+        needs_score TINYINT(1) AS (sentiment_score IS NULL OR sentiment_hash IS NULL OR sentiment_hash <> SHA1(article)) STORED,
+        url_hash CHAR(40) AS (SHA1(url)) STORED,
+        UNIQUE KEY uq_news_url_hash (url_hash),
+        INDEX idx_news_influencer_id (influencer_id),
+        INDEX idx_news_sentiment_score (sentiment_score),
+        INDEX idx_news_needs_score (needs_score),
         FOREIGN KEY (Influencer_id) REFERENCES Influencers(id) ON DELETE CASCADE
     );
     """
@@ -111,6 +83,13 @@ def create_videos_table(connection):
         title VARCHAR(255),
         comment TEXT NOT NULL,
         sentiment_score INT,
+        sentiment_hash CHAR(40),
+        needs_score TINYINT(1) AS (sentiment_score IS NULL OR sentiment_hash IS NULL OR sentiment_hash <> SHA1(comment)) STORED,
+        comment_hash CHAR(40) AS (SHA1(CONCAT_WS('\\n', url, comment))) STORED,
+        UNIQUE KEY uq_videos_comment_hash (comment_hash),
+        INDEX idx_videos_influencer_id (influencer_id),
+        INDEX idx_videos_sentiment_score (sentiment_score),
+        INDEX idx_videos_needs_score (needs_score),
         FOREIGN KEY (Influencer_id) REFERENCES Influencers(id) ON DELETE CASCADE
     );
     """
@@ -130,6 +109,7 @@ def create_votes_table(connection):
         influencer_id INT NOT NULL,
         good_vote INT DEFAULT 0,
         bad_vote INT DEFAULT 0,
+        UNIQUE KEY uq_votes_influencer_id (influencer_id),
         FOREIGN KEY (Influencer_id) REFERENCES Influencers(id) ON DELETE CASCADE
     );
     """
@@ -149,6 +129,7 @@ def create_vibe_score_history_table(connection):
         influencer_id INT NOT NULL,
         vibe_score DECIMAL(5, 2) NOT NULL,
         recorded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_vibescorehistory_influencer_recorded (influencer_id, recorded_at),
         FOREIGN KEY (influencer_id) REFERENCES Influencers(id) ON DELETE CASCADE
     );
     """
@@ -159,33 +140,144 @@ def create_vibe_score_history_table(connection):
     except Error as e:
         print(f"Error creating VibeScoreHistory table: {e}")
 
+#create the table that remembers which Parquet partitions were loaded
+def create_ingested_partitions_table(connection):
+    print("Creating IngestedPartitions table...")
+    create_table_query = """
+    CREATE TABLE IF NOT EXISTS IngestedPartitions (
+        dataset VARCHAR(32) NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        loaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (dataset, name)
+    );
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(create_table_query)
+            connection.commit()
+    except Error as e:
+        print(f"Error creating IngestedPartitions table: {e}")
+
+#check the information schema for a column / index, used by the migrations below
+def column_exists(cursor, table_name, column_name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table_name, column_name)
+    )
+    return cursor.fetchone()[0] > 0
+
+def index_exists(cursor, table_name, index_name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table_name, index_name)
+    )
+    return cursor.fetchone()[0] > 0
+
+#migration for databases created before incremental sentiment analysis:
+#adds the sentiment_hash column and the needs_score flag (with its index) used to find rows to (re)score
+def migrate_sentiment_columns(connection):
+    print("Migrating sentiment columns...")
+    try:
+        with connection.cursor() as cursor:
+            for table_name, text_column in (("News", "article"), ("Videos", "comment")):
+                if not column_exists(cursor, table_name, "sentiment_hash"):
+                    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN sentiment_hash CHAR(40)")
+                index_name = f"idx_{table_name.lower()}_sentiment_score"
+                if not index_exists(cursor, table_name, index_name):
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table_name} (sentiment_score)")
+                if not column_exists(cursor, table_name, "needs_score"):
+                    cursor.execute(f"""
+                    ALTER TABLE {table_name} ADD COLUMN needs_score TINYINT(1)
+                        AS (sentiment_score IS NULL OR sentiment_hash IS NULL OR sentiment_hash <> SHA1({text_column})) STORED
+                        AFTER sentiment_hash
+                    """)
+                index_name = f"idx_{table_name.lower()}_needs_score"
+                if not index_exists(cursor, table_name, index_name):
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table_name} (needs_score)")
+            connection.commit()
+    except Error as e:
+        print(f"Error migrating sentiment columns: {e}")
+
+#migration for databases created before votes were upserted:
+#merges duplicate Votes rows of the same influencer and adds the unique key the upsert relies on
+def migrate_votes_unique_key(connection):
+    print("Migrating Votes unique key...")
+    try:
+        with connection.cursor() as cursor:
+            if index_exists(cursor, "Votes", "uq_votes_influencer_id"):
+                return
+            #add the counts of the duplicates to the oldest row of each influencer
+            cursor.execute("""
+            UPDATE Votes v
+            JOIN (SELECT influencer_id, MIN(id) AS keep_id, SUM(good_vote) AS good_vote, SUM(bad_vote) AS bad_vote
+                  FROM Votes GROUP BY influencer_id HAVING COUNT(*) > 1) d ON v.id = d.keep_id
+            SET v.good_vote = d.good_vote, v.bad_vote = d.bad_vote
+            """)
+            #then delete the duplicates
+            cursor.execute("""
+            DELETE v FROM Votes v
+            JOIN (SELECT influencer_id, MIN(id) AS keep_id FROM Votes GROUP BY influencer_id) k
+                ON v.influencer_id = k.influencer_id AND v.id <> k.keep_id
+            """)
+            cursor.execute("ALTER TABLE Votes ADD UNIQUE KEY uq_votes_influencer_id (influencer_id)")
+            connection.commit()
+    except Error as e:
+        print(f"Error migrating Votes unique key: {e}")
+
+#migration for databases created before the hash keys:
+#adds the SHA-1 columns the loaders dedupe on (removing rows that are already duplicated) and the influencer_id indexes
+def migrate_dedup_keys(connection):
+    print("Migrating dedup keys and indexes...")
+    hash_columns = (
+        ("News", "url_hash", "SHA1(url)", "uq_news_url_hash"),
+        ("Videos", "comment_hash", "SHA1(CONCAT_WS('\\n', url, comment))", "uq_videos_comment_hash"),
+    )
+    indexes = (
+        ("News", "idx_news_influencer_id", "influencer_id"),
+        ("Videos", "idx_videos_influencer_id", "influencer_id"),
+        ("VibeScoreHistory", "idx_vibescorehistory_influencer_recorded", "influencer_id, recorded_at"),
+    )
+    try:
+        with connection.cursor() as cursor:
+            for table_name, column_name, expression, key_name in hash_columns:
+                if not column_exists(cursor, table_name, column_name):
+                    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} CHAR(40) AS ({expression}) STORED")
+                if not index_exists(cursor, table_name, key_name):
+                    #keep the oldest row of every duplicate, the unique key can't be added otherwise
+                    cursor.execute(f"""
+                    DELETE t FROM {table_name} t
+                    JOIN (SELECT {column_name}, MIN(id) AS keep_id FROM {table_name} GROUP BY {column_name}) k
+                        ON t.{column_name} = k.{column_name} AND t.id <> k.keep_id
+                    """)
+                    cursor.execute(f"ALTER TABLE {table_name} ADD UNIQUE KEY {key_name} ({column_name})")
+            #Votes already has its unique key on influencer_id, which doubles as the lookup index
+            for table_name, index_name, columns in indexes:
+                if not index_exists(cursor, table_name, index_name):
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table_name} ({columns})")
+            connection.commit()
+    except Error as e:
+        print(f"Error migrating dedup keys: {e}")
+
 #add influencers into the Influencers table
 def add_influencers(connection, influencers_data):
     insert_influencer_query = """
     INSERT INTO Influencers (name, image_url, bio, instagram, youtube)
     VALUES (%s, %s, %s, %s, %s)
     """
-    check_influencer_query = "SELECT id FROM Influencers WHERE name = %s"
 
     try:
-        with connection.cursor() as cursor:
-            for _, row in influencers_data.iterrows():
-                #check if influencer already exists
-                cursor.execute(check_influencer_query, (row['Name'],))
-                result = cursor.fetchone()
-                if result is None:
-                    #insert the new influencer with all fields
-                    cursor.execute(insert_influencer_query, (
-                        row['Name'],
-                        row['Image_URL'],
-                        row['Bio'],
-                        row['Instagram'],
-                        row['YouTube']
-                    ))
-                    connection.commit()
-                    print(f"Influencer '{row['Name']}' added.")
-                else:
-                    print(f"Influencer '{row['Name']}' already exists in the database.")
+        with IngestTimer("Influencers") as timer:
+            with connection.cursor() as cursor:
+                #names already in the database, fetched once instead of checked per row
+                existing_names = set(fetch_influencer_ids(cursor))
+            rows = []
+            for name, image_url, bio, instagram, youtube in influencers_data[['Name', 'Image_URL', 'Bio', 'Instagram', 'YouTube']].itertuples(index=False):
+                if name in existing_names:
+                    print(f"Influencer '{name}' already exists in the database.")
+                    continue
+                existing_names.add(name)                            #also skips duplicates inside the CSV
+                rows.append((name, image_url, bio, instagram, youtube))
+            timer.rows = insert_in_batches(connection, insert_influencer_query, rows)
     except Error as e:
         print(f"Error inserting influencers: {e}")
 
@@ -201,135 +293,111 @@ def process_influencers_csv(connection, file_path):
     else:
         print(f"Missing required columns in file: {file_path}")
 
-#some names in youtube channels are different from our database
 def add_videos_with_name_mapping(connection, yt_data):
-    #define name mapping
-    name_mapping = {
-        'Diddy': 'P Diddy',
-        'The Rock': 'Dwayne Johnson',
-        'CaseyNeistat': 'Casey Neistat',
-        'PowerfulJRE': 'Joe Rogan',
-        'Kai Cenat Live': 'Kai Cenat'
-    }
-    #apply the name mapping
-    yt_data['Name'] = yt_data['Name'].replace(name_mapping)
-    insert_videos_query = """
-    INSERT INTO Videos (influencer_id, url, title, comment, sentiment_score)
-    VALUES (%s, %s, %s, %s, %s)
-    """
-    check_video_query = """
-    SELECT id FROM Videos WHERE url = %s AND comment = %s
-    """
-    check_influencer_query = "SELECT id FROM Influencers WHERE name = %s"
-
     try:
-        with connection.cursor() as cursor:
-            for _, row in yt_data.iterrows():
-                #find influencer_id using the mapped name
-                cursor.execute(check_influencer_query, (row['Name'],))
-                influencer_id = cursor.fetchone()
-                if influencer_id:
-                    #check if the video and comment already exist
-                    cursor.execute(check_video_query, (row['URL'], row['comment']))
-                    video_exists = cursor.fetchone()
-                    if not video_exists:
-                        #insert the new video and comment
-                        cursor.execute(insert_videos_query, (
-                            influencer_id[0],                                   #ID from the Influencers table
-                            row['URL'],
-                            row['Title'],
-                            row['comment'],
-                            None                                                #no sentiment score available yet in this stage
-                        ))
-                        connection.commit()
-                        print(f"Video '{row['Title']}' added for influencer '{row['Name']}'.")
-                else:
-                    print(f"Influencer '{row['Name']}' not found in the database.")
+        with IngestTimer("Videos") as timer:
+            with connection.cursor() as cursor:
+                influencer_ids = fetch_influencer_ids(cursor)
+            missing_names = set()
+            invalid = 0
+            #yt_data is a DataFrame or an iterator of chunks, every chunk is mapped, checked and written on its own
+            for chunk in iter_chunks(yt_data):
+                rows, dropped = prepare_video_rows(chunk, influencer_ids, missing_names)
+                invalid += dropped
+                timer.rows += write_video_rows(connection, rows)
+            for name in sorted(missing_names):
+                print(f"Influencer '{name}' not found in the database.")
+            if invalid:
+                print(f"Skipped {invalid} YouTube rows without a name, url or comment.")
+        return True
     except Error as e:
         print(f"Error inserting into Videos table: {e}")
+        return False
 
 #process the YouTube data CSV, same logic
-def process_yt_videos_csv(connection, file_path):
+def process_yt_videos_csv(connection, file_path, chunksize=INGEST_CHUNK_SIZE):
     print(f"Processing YouTube data from: {file_path}")
-    data = pd.read_csv(file_path)
     required_columns = {'Name', 'URL', 'Title', 'comment'}
-    if required_columns.issubset(data.columns):
-        add_videos_with_name_mapping(connection, data)
+    #only the header is read here, the rows are streamed in chunks so memory stays flat however big the file is
+    columns = pd.read_csv(file_path, nrows=0).columns
+    if required_columns.issubset(columns):
+        chunks = pd.read_csv(file_path, usecols=list(required_columns), dtype=str, chunksize=chunksize)
+        add_videos_with_name_mapping(connection, chunks)
     else:
         print(f"Missing required columns in file: {file_path}")
 
 #add articles into the News table
 def add_news(connection, news_data):
-    insert_news_query = """
-    INSERT INTO News (influencer_id, url, title, article, sentiment_score)
-    VALUES (%s, %s, %s, %s, %s)
-    """
-    check_influencer_query = "SELECT id FROM Influencers WHERE name = %s"
-    check_news_query = "SELECT id FROM News WHERE url = %s"
     try:
-        with connection.cursor() as cursor:
-            for _, row in news_data.iterrows():
-                #find influencer_id using the celebrity name
-                cursor.execute(check_influencer_query, (row['Celebrity'],))
-                influencer_id = cursor.fetchone()
-                
-                if influencer_id:
-                    #check if the news article already exists
-                    cursor.execute(check_news_query, (row['URL'],))
-                    news_exists = cursor.fetchone()
-                    if not news_exists:
-                        #insert the new news article
-                        cursor.execute(insert_news_query, (
-                            influencer_id[0],                                       #ID from the Influencers table
-                            row['URL'],
-                            row['Title'],
-                            row['Content'],
-                            None                                                    #no sentiment score available yet
-                        ))
-                        connection.commit()
-                        print(f"News '{row['Title']}' added for celebrity '{row['Celebrity']}'.")
-                else:
-                    print(f"Celebrity '{row['Celebrity']}' not found in the database.")
+        with IngestTimer("News") as timer:
+            with connection.cursor() as cursor:
+                influencer_ids = fetch_influencer_ids(cursor)
+            missing_names = set()
+            invalid = 0
+            #news_data is a DataFrame or an iterator of chunks, same as for the videos
+            for chunk in iter_chunks(news_data):
+                rows, dropped = prepare_news_rows(chunk, influencer_ids, missing_names)
+                invalid += dropped
+                timer.rows += write_news_rows(connection, rows)
+            for name in sorted(missing_names):
+                print(f"Celebrity '{name}' not found in the database.")
+            if invalid:
+                print(f"Skipped {invalid} TMZ rows without a celebrity, url or content.")
+        return True
     except Error as e:
         print(f"Error inserting into News table: {e}")
+        return False
 
 #process the TMZ data CSV, same logic
-def process_tmz_news_csv(connection, file_path):
+def process_tmz_news_csv(connection, file_path, chunksize=INGEST_CHUNK_SIZE):
     print(f"Processing TMZ data from: {file_path}")
-    data = pd.read_csv(file_path, names=['Celebrity', 'Title', 'URL', 'Content'], header=0)
-    required_columns = {'Celebrity', 'Title', 'URL', 'Content'}
-    if required_columns.issubset(data.columns):
-        add_news(connection, data)
-    else:
-        print(f"Missing required columns in file: {file_path}")
+    #the rows are streamed in chunks, see process_yt_videos_csv
+    #the scraper writes the file without a header row, so the first line is already an article
+    chunks = pd.read_csv(file_path, names=['Celebrity', 'Title', 'URL', 'Content'], header=None, dtype=str, chunksize=chunksize)
+    add_news(connection, chunks)
+
+#load the Parquet partitions (one per scrape run, see scraping/parquet_store.py) that weren't loaded before.
+#only the columns the loader needs are read, and a partition is marked as loaded once its rows are in
+def process_partitions(connection, dataset, directory, columns, loader):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM IngestedPartitions WHERE dataset = %s", (dataset,))
+            loaded = {name for (name,) in cursor.fetchall()}
+        new_partitions = [name for name in list_partitions(directory) if name not in loaded]
+        print(f"{len(new_partitions)} new partitions in {directory} ({len(loaded)} already loaded)")
+        for name in new_partitions:
+            if not loader(connection, read_partition(directory, name, columns)):
+                break
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO IngestedPartitions (dataset, name) VALUES (%s, %s)", (dataset, name))
+            connection.commit()
+    except (Error, OSError, ImportError) as e:
+        print(f"Error loading partitions from {directory}: {e}")
+
+#Parquet versions of process_yt_videos_csv / process_tmz_news_csv
+def process_yt_videos_parquet(connection, directory=YT_PARQUET_DIR):
+    print(f"Processing YouTube data from: {directory}")
+    process_partitions(connection, "youtube", directory, YT_COLUMNS, add_videos_with_name_mapping)
+
+def process_tmz_news_parquet(connection, directory=TMZ_PARQUET_DIR):
+    print(f"Processing TMZ data from: {directory}")
+    process_partitions(connection, "tmz", directory, TMZ_COLUMNS, add_news)
 
 #populate the Votes table with default values
 def populate_votes_table(connection):
     print("Populating Votes table...")
+    #one statement creates the missing rows for every influencer without votes
     insert_votes_query = """
     INSERT INTO Votes (influencer_id, good_vote, bad_vote)
-    VALUES (%s, %s, %s)
-    """
-    check_votes_query = """
-    SELECT id FROM Votes WHERE influencer_id = %s
-    """
-    get_influencers_query = """
-    SELECT id FROM Influencers
+    SELECT i.id, 0, 0 FROM Influencers i
+    WHERE NOT EXISTS (SELECT 1 FROM Votes v WHERE v.influencer_id = i.id)
     """
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(get_influencers_query)
-            influencers = cursor.fetchall()
-            for influencer in influencers:
-                influencer_id = influencer[0]
-                #check if a row already exists for this influencer
-                cursor.execute(check_votes_query, (influencer_id,))
-                vote_exists = cursor.fetchone()
-                if not vote_exists:
-                    #insert a new row with default values for good_vote and bad_vote
-                    cursor.execute(insert_votes_query, (influencer_id, 0, 0))
-                    connection.commit()
-                    print(f"Votes entry created for influencer ID {influencer_id}.")
+        with IngestTimer("Votes") as timer:
+            with connection.cursor() as cursor:
+                cursor.execute(insert_votes_query)
+                timer.rows = cursor.rowcount
+            connection.commit()
     except Error as e:
         print(f"Error populating Votes table: {e}")
 
@@ -357,14 +425,10 @@ def update_vibe_score_history(connection):
         print(f"Error updating vibe score history: {e}")
 
 
-#main function that runs the scraping files and creates the database and tables
+#main function that creates the database and tables and runs the scrapers straight into them
 def main():
-    #run TMZ scraper
-    print("Running TMZ scraper...")
-    tmz_scraper_main()
-    #run YouTube scraper
-    print("Running YouTube scraper...")
-    youtube_scraper_main()
+    #imported here, so importing main.py for the database helpers stays fast and offline
+    from pipeline import run_scrape_pipeline
 
     #connect without specifying the database first to see if it doesn't exist
     connection = create_connection(with_database=False)
@@ -380,15 +444,39 @@ def main():
         create_videos_table(connection)                     #create comments table
         create_votes_table(connection)                      #create votes table
         create_vibe_score_history_table(connection)         #create history table
+        create_ingested_partitions_table(connection)        #loaded Parquet partitions
+        migrate_sentiment_columns(connection)               #bring older databases up to date
+        migrate_votes_unique_key(connection)
+        migrate_dedup_keys(connection)
 
         #process influencers.csv file and add it to the Influencers table
         process_influencers_csv(connection, "scraping/influencers.csv")
         #populate the Votes table
         populate_votes_table(connection)
-        #process youtube .csv file and add it to Videos table
-        process_yt_videos_csv(connection, "scraping/yt_scraped.csv")
-        #process TMZ data and add it to the News table
-        process_tmz_news_csv(connection, "scraping/tmz_scraped.csv")
+
+        #run the TMZ and YouTube scrapers in parallel, their records are written to News / Videos while they scrape
+        #(the scrapers still append to their CSVs, which are loaded below if a pipeline write failed)
+        print("Running TMZ and YouTube scrapers...")
+        pipeline = run_scrape_pipeline()
+
+        #the scrapers already recorded what they fetched (article index, YouTube state), so records a pipeline
+        #writer couldn't store would never be scraped again. in CSV mode, load the CSVs the scrapers appended to
+        #for the kinds that had errors, rows that are already stored are skipped
+        failed_kinds = pipeline.failed_kinds()
+        if failed_kinds and not use_parquet():
+            print(f"Pipeline had errors writing {', '.join(sorted(failed_kinds))}, loading the scraped CSVs...")
+            if "news" in failed_kinds and os.path.exists("scraping/tmz_scraped.csv"):
+                process_tmz_news_csv(connection, "scraping/tmz_scraped.csv")
+            if "videos" in failed_kinds and os.path.exists("scraping/yt_scraped.csv"):
+                process_yt_videos_csv(connection, "scraping/yt_scraped.csv")
+
+        #with SCRAPE_FORMAT=parquet the scrape runs are saved as partitions: load the ones not in IngestedPartitions yet,
+        #that marks this run's partition as loaded (its rows are already in, INSERT IGNORE skips them) and picks up
+        #runs whose database writes failed
+        if use_parquet():
+            process_tmz_news_parquet(connection)
+            process_yt_videos_parquet(connection)
+
         update_vibe_score_history(connection)
         
         connection.close()
@@ -0,0 +1,227 @@
+# staged scrape-to-database pipeline used by main.py:
+#
+#   TMZ scraper ─┐                      ┌─> news queue ───> News writer
+#                ├─> raw queue ─> normalize
+#   YouTube  ────┘                      └─> videos queue ─> Videos writer
+#
+# the scrapers hand over records as soon as they have them, every stage runs on its own thread and
+# the queues are bounded, so a slow stage holds back the one before it instead of piling up memory.
+# the scrapers still save their CSV (or Parquet) files, which stay loadable with the process_* functions in main.py.
+
+# import the required libraries
+import os
+import queue
+import threading
+import time
+import pandas as pd
+from dotenv import load_dotenv
+from mysql.connector import Error
+from ingest import (create_connection, fetch_influencer_ids, prepare_news_rows, prepare_video_rows, write_news_rows,
+                    write_video_rows, INGEST_BATCH_SIZE)
+from scraping.parquet_store import TMZ_COLUMNS as NEWS_COLUMNS, YT_COLUMNS as VIDEOS_COLUMNS
+
+load_dotenv()
+
+# items (batches of records) each queue holds before the stage feeding it has to wait
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 100))
+
+_DONE = object()  # end of stream marker passed down the queues
+
+
+class StageStats:
+    """Records handled, time spent working and deepest queue seen by one stage."""
+
+    def __init__(self, name, input_queue=None):
+        self.name = name
+        self.input_queue = input_queue
+        self.records = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def count(self, records, seconds):
+        with self._lock:
+            self.records += records
+            self.busy_seconds += seconds
+            if self.input_queue is not None:
+                self.max_queue_depth = max(self.max_queue_depth, self.input_queue.qsize())
+
+    def failed(self):
+        with self._lock:
+            self.errors += 1
+
+
+class Pipeline:
+    """
+    sources maps a source name to a function that takes an emit(kind, records) callback and runs a scraper,
+    kind is "news" or "videos". records are tuples in NEWS_COLUMNS order or dicts with VIDEOS_COLUMNS keys.
+    connect is called once per writer thread and must return a new database connection.
+    """
+
+    def __init__(self, sources, connect=create_connection, queue_size=PIPELINE_QUEUE_SIZE, batch_size=INGEST_BATCH_SIZE):
+        self.sources = sources
+        self.connect = connect
+        self.batch_size = batch_size
+        self.raw_queue = queue.Queue(maxsize=queue_size)
+        self.write_queues = {"news": queue.Queue(maxsize=queue_size), "videos": queue.Queue(maxsize=queue_size)}
+        self.stats = {name: StageStats(f"source:{name}") for name in sources}
+        self.stats["normalize"] = StageStats("normalize", self.raw_queue)
+        self.stats["news"] = StageStats("write:News", self.write_queues["news"])
+        self.stats["videos"] = StageStats("write:Videos", self.write_queues["videos"])
+        self.elapsed = None
+
+    def _run_source(self, name, source):
+        stats = self.stats[name]
+        last = time.perf_counter()
+
+        def emit(kind, records):
+            nonlocal last
+            # time spent scraping since the last emit, the put below blocks while the queue is full
+            now = time.perf_counter()
+            stats.count(len(records), now - last)
+            self.raw_queue.put((kind, records))
+            last = time.perf_counter()
+
+        try:
+            source(emit)
+        except Exception as e:
+            stats.failed()
+            print(f"Error in pipeline source {name}: {e}")
+        finally:
+            self.raw_queue.put(_DONE)
+
+    def _run_normalizer(self):
+        stats = self.stats["normalize"]
+        missing_names = set()
+        invalid = 0
+        influencer_ids = {}
+        try:
+            connection = self.connect()
+            if connection is None:
+                raise Error("no database connection")
+            with connection.cursor() as cursor:
+                influencer_ids = fetch_influencer_ids(cursor)
+            connection.close()
+        except Exception as e:
+            print(f"Error loading influencers for the pipeline: {e}")
+            stats.failed()
+
+        running_sources = len(self.sources)
+        while running_sources:
+            item = self.raw_queue.get()
+            if item is _DONE:
+                running_sources -= 1
+                continue
+            kind, records = item
+            start = time.perf_counter()
+            try:
+                if kind == "news":
+                    rows, dropped = prepare_news_rows(pd.DataFrame(records, columns=NEWS_COLUMNS), influencer_ids, missing_names)
+                else:
+                    rows, dropped = prepare_video_rows(pd.DataFrame(records, columns=VIDEOS_COLUMNS), influencer_ids, missing_names)
+            except Exception as e:
+                # drop the batch but keep reading, a stage that stops would leave the sources blocked on a full queue
+                stats.failed()
+                print(f"Error normalizing {kind} in the pipeline: {e}")
+                continue
+            invalid += dropped
+            stats.count(len(records), time.perf_counter() - start)
+            if rows:
+                self.write_queues[kind].put(rows)
+
+        for write_queue in self.write_queues.values():
+            write_queue.put(_DONE)
+        for name in sorted(missing_names):
+            print(f"Pipeline: '{name}' not found in the database.")
+        if invalid:
+            print(f"Pipeline: skipped {invalid} records without a name, url or text.")
+
+    def _run_writer(self, kind):
+        stats = self.stats[kind]
+        write_queue = self.write_queues[kind]
+        write_rows = write_news_rows if kind == "news" else write_video_rows
+        try:
+            connection = self.connect()
+        except Exception as e:
+            print(f"Error connecting the {kind} writer: {e}")
+            connection = None
+        done = False
+        while not done:
+            # take what is waiting, up to a batch, so many small emits turn into few INSERTs
+            rows = {}
+            item = write_queue.get()
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+                for key, row in item.items():
+                    rows.setdefault(key, row)
+                if len(rows) >= self.batch_size:
+                    break
+                try:
+                    item = write_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not rows:
+                continue
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    raise Error("no database connection")
+                inserted = write_rows(connection, rows)
+            except Exception as e:
+                # keep draining the queue until _DONE so the stages before this one don't block forever
+                stats.failed()
+                print(f"Error writing {kind} in the pipeline: {e}")
+                inserted = 0
+            stats.count(inserted, time.perf_counter() - start)
+        if connection is not None:
+            connection.close()
+
+    def run(self):
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._run_source, args=(name, source), name=f"pipeline-{name}")
+                   for name, source in self.sources.items()]
+        threads.append(threading.Thread(target=self._run_normalizer, name="pipeline-normalize"))
+        threads += [threading.Thread(target=self._run_writer, args=(kind,), name=f"pipeline-write-{kind}")
+                    for kind in self.write_queues]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - start
+        return self.stats
+
+    def failed_kinds(self):
+        # "news" / "videos" if some of their records may not have been written: a writer error, or a
+        # normalizer error (which can drop records of either kind)
+        if self.stats["normalize"].errors:
+            return set(self.write_queues)
+        return {kind for kind in self.write_queues if self.stats[kind].errors}
+
+    def report(self):
+        lines = [f"{'stage':<16} {'records':>8} {'busy s':>8} {'records/s':>10} {'max queue':>10} {'errors':>7}"]
+        for stats in self.stats.values():
+            rate = stats.records / stats.busy_seconds if stats.busy_seconds > 0 else 0
+            depth = stats.max_queue_depth if stats.input_queue is not None else "-"
+            lines.append(f"{stats.name:<16} {stats.records:>8} {stats.busy_seconds:>8.2f} {rate:>10.0f} {depth:>10} {stats.errors:>7}")
+        lines.append(f"total time {self.elapsed:.2f}s")
+        return "\n".join(lines)
+
+
+def scraper_sources():
+    # the scrapers' main functions with their records routed into the pipeline
+    from scraping.tmz_scraper import main as tmz_scraper_main
+    from scraping.youtube_scraper import main as youtube_scraper_main
+    return {
+        "tmz": lambda emit: tmz_scraper_main(on_article=lambda article: emit("news", [article])),
+        "youtube": lambda emit: youtube_scraper_main(on_rows=lambda rows: emit("videos", rows)),
+    }
+
+
+def run_scrape_pipeline(connect=create_connection):
+    pipeline = Pipeline(scraper_sources(), connect=connect)
+    pipeline.run()
+    print(pipeline.report())
+    return pipeline
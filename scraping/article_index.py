@@ -0,0 +1,224 @@
+# persistent indexes for the TMZ scraper:
+# - ArticleIndex: the pages we already fetched, so a scrape run can skip known articles
+#   and send conditional requests (If-None-Match / If-Modified-Since) for pages it re-checks.
+# - SavedArticleKeys: the articles already written to tmz_scraped.csv, so save_to_csv doesn't have to re-read it.
+
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+
+class ArticleIndex:
+    """
+    SQLite backed index of fetched URLs with their ETag / Last-Modified validators.
+
+    Writes are kept in one transaction until commit(), which the scraper calls after the articles were
+    saved, so a run that crashes half way doesn't mark articles as known that never made it to the CSV.
+    """
+
+    def __init__(self, path="scraping/tmz_index.sqlite"):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute("""
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            results TEXT,
+            fetched_at REAL
+        )
+        """)
+        self._connection.commit()
+        self.known_skipped = 0
+        self.not_modified = 0
+        self.fetched = 0
+
+    def is_known(self, url):
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def conditional_headers(self, url):
+        # headers that let the server answer 304 Not Modified if the page didn't change
+        with self._lock:
+            row = self._connection.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row is not None:
+            etag, last_modified = row
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def cached_results(self, url):
+        # what we parsed out of the page last time, used when the server says 304
+        with self._lock:
+            row = self._connection.execute("SELECT results FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def record(self, url, response, results=None):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, results, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 json.dumps(results) if results is not None else None, time.time())
+            )
+
+    def count_skipped(self):
+        with self._lock:
+            self.known_skipped += 1
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def count_fetched(self):
+        with self._lock:
+            self.fetched += 1
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def report(self):
+        avoided = self.known_skipped + self.not_modified
+        return (f"{self.fetched} pages fetched, {avoided} fetches avoided "
+                f"({self.known_skipped} already known, {self.not_modified} not modified)")
+
+
+def normalize_url(url):
+    # same article, same key: lowercase scheme/host, no fragment, no trailing slash
+    parts = urllib.parse.urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def title_hash(title):
+    return hashlib.sha1(title.strip().lower().encode("utf-8")).hexdigest()
+
+
+class SavedArticleKeys:
+    """
+    SQLite set of the articles in the TMZ CSV, keyed by normalized URL and by a hash of the lowercased title.
+    An article is a duplicate if either key is known, checking it is a primary key lookup.
+
+    The index remembers the CSV size it covers. Before add() appends to the CSV it commits the size the file
+    will have once the append is done (write-ahead), then writes and fsyncs the CSV and commits the new keys.
+    On the next open after a crash, a tail that ends exactly at the recorded size is complete and gets indexed,
+    anything else is cut back to the indexed size (a torn write can even end on a newline inside a quoted field,
+    so the tail itself can't tell). A missing or shrunk index is rebuilt from the whole CSV once.
+    """
+
+    def __init__(self, csv_path, path=None):
+        self.csv_path = csv_path
+        self.path = path or os.path.splitext(csv_path)[0] + "_keys.sqlite"
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS article_keys (key TEXT PRIMARY KEY)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._connection.commit()
+        self._sync_with_csv()
+
+    @staticmethod
+    def keys(article):
+        # article rows are (celebrity, title, url, content), like the CSV columns
+        return ("url:" + normalize_url(article[2]), "title:" + title_hash(article[1]))
+
+    def _indexed_size(self):
+        row = self._connection.execute("SELECT value FROM meta WHERE name = 'csv_size'").fetchone()
+        return int(row[0]) if row is not None else None
+
+    def _set_indexed_size(self, size):
+        self._connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('csv_size', ?)", (str(size),))
+
+    def _pending_size(self):
+        row = self._connection.execute("SELECT value FROM meta WHERE name = 'pending_size'").fetchone()
+        return int(row[0]) if row is not None else None
+
+    def _set_pending_size(self, size):
+        if size is None:
+            self._connection.execute("DELETE FROM meta WHERE name = 'pending_size'")
+        else:
+            self._connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('pending_size', ?)", (str(size),))
+
+    def _index_rows(self, rows):
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO article_keys (key) VALUES (?)",
+            ((key,) for row in rows if len(row) >= 3 for key in self.keys(row))
+        )
+
+    def _sync_with_csv(self):
+        csv_size = os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+        indexed_size = self._indexed_size()
+        if indexed_size is None or csv_size < indexed_size:
+            # no index yet, or the CSV was replaced: one full pass over the file
+            self._connection.execute("DELETE FROM article_keys")
+            if csv_size:
+                with open(self.csv_path, mode='r', newline='', encoding='utf-8') as file:
+                    self._index_rows(csv.reader(file))
+        elif csv_size > indexed_size:
+            if csv_size == self._pending_size():
+                # a run crashed after a complete append but before committing its keys
+                with open(self.csv_path, mode='rb') as file:
+                    file.seek(indexed_size)
+                    tail = file.read()
+                self._index_rows(csv.reader(io.StringIO(tail.decode('utf-8'), newline='')))
+            else:
+                # the append was cut off (or the bytes aren't ours), drop them so the next append starts clean
+                with open(self.csv_path, mode='r+b') as file:
+                    file.truncate(indexed_size)
+                csv_size = indexed_size
+        self._set_indexed_size(csv_size)
+        self._set_pending_size(None)
+        self._connection.commit()
+
+    def contains(self, article):
+        row = self._connection.execute("SELECT 1 FROM article_keys WHERE key IN (?, ?) LIMIT 1", self.keys(article)).fetchone()
+        return row is not None
+
+    def add(self, articles):
+        """Appends the articles that aren't known yet to the CSV and the index. Returns the ones that were added."""
+        new_articles = []
+        seen = set()
+        for article in articles:
+            keys = self.keys(article)
+            if seen.intersection(keys) or self.contains(article):
+                continue
+            seen.update(keys)
+            new_articles.append(article)
+        if not new_articles:
+            return new_articles
+
+        # all rows go out in one write, followed by fsync, before the index records them
+        buffer = io.StringIO(newline='')
+        writer = csv.writer(buffer)
+        writer.writerows(new_articles)
+        data = buffer.getvalue().encode('utf-8')
+        # write-ahead: the size the CSV has once this append is complete, see _sync_with_csv
+        end = self._indexed_size() + len(data)
+        self._set_pending_size(end)
+        self._connection.commit()
+        with open(self.csv_path, mode='ab') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self._index_rows(new_articles)
+        self._set_indexed_size(end)
+        self._set_pending_size(None)
+        self._connection.commit()
+        return new_articles
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,97 @@
+# shared HTTP fetching for the scrapers: pooled keep-alive session, per-host rate limiting,
+# retries with exponential backoff and timeouts. safe to use from many threads at once.
+
+import threading
+import time
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+
+# status codes worth retrying, everything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst` requests."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # take a token, or reserve the next one and sleep until it is available
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Fetcher:
+    """
+    - rate / burst: politeness budget per host (requests per second, burst size)
+    - retries / backoff: a failed or 429/5xx request is retried after backoff, 2*backoff, 4*backoff, ... seconds
+    - timeout: seconds to wait for the server (connect and read)
+    - max_connections: keep-alive connections kept per host, should be at least the number of threads
+    """
+
+    def __init__(self, rate=2.0, burst=2, retries=3, backoff=1.0, timeout=15, max_connections=16, headers=None):
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def _bucket(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def _sleep_before_retry(self, attempt, response=None):
+        delay = self.backoff * (2 ** attempt)
+        # respect the server's Retry-After if it sent one in seconds
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        time.sleep(delay)
+
+    def get(self, url, headers=None):
+        """Returns the response (whatever its status) or None if every attempt failed to connect."""
+        bucket = self._bucket(url)
+        for attempt in range(self.retries + 1):
+            bucket.acquire()
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    print(f"Error fetching {url}: {e}")
+                    with self._lock:
+                        self.failures += 1
+                    return None
+                self._sleep_before_retry(attempt)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                self._sleep_before_retry(attempt, response)
+                continue
+            return response
+        return None
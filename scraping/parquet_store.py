@@ -0,0 +1,65 @@
+# optional Parquet output for the scrapers: every scrape run writes one partition file into a directory
+# (scraping/tmz_parquet/, scraping/yt_parquet/), so loaders can read just the runs they haven't loaded yet
+# and just the columns they need. needs pyarrow (pip install pyarrow), the CSV files stay the default.
+
+import os
+import time
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# csv (default) or parquet
+SCRAPE_FORMAT = os.getenv('SCRAPE_FORMAT', 'csv').lower()
+
+TMZ_PARQUET_DIR = 'scraping/tmz_parquet'
+YT_PARQUET_DIR = 'scraping/yt_parquet'
+TMZ_COLUMNS = ['Celebrity', 'Title', 'URL', 'Content']
+YT_COLUMNS = ['Name', 'Title', 'URL', 'comment']
+
+
+_pyarrow_missing_reported = False
+
+
+def use_parquet():
+    # parquet without pyarrow installed falls back to the CSV files, so scraped data is never left unsaved
+    global _pyarrow_missing_reported
+    if SCRAPE_FORMAT != 'parquet':
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if not _pyarrow_missing_reported:
+            print("SCRAPE_FORMAT=parquet but pyarrow is not installed (pip install pyarrow), using CSV instead.")
+            _pyarrow_missing_reported = True
+        return False
+    return True
+
+
+def write_partition(records, directory, columns):
+    """
+    Writes the records of one scrape run as a new partition file and returns its path (None if there are no records).
+    The file is written under a temporary name and renamed, so a partition is either complete or not there.
+    """
+    if not records:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    # the UTC run time makes the names sort in run order
+    now = time.time_ns()
+    name = time.strftime("run-%Y%m%dT%H%M%S", time.gmtime(now // 1000000000)) + f"-{now % 1000000000:09d}.parquet"
+    path = os.path.join(directory, name)
+    frame = pd.DataFrame(records, columns=columns).astype("string")
+    frame.to_parquet(path + ".tmp", engine="pyarrow", index=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def list_partitions(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.endswith(".parquet"))
+
+
+def read_partition(directory, name, columns):
+    # only the requested columns are read from the file
+    return pd.read_parquet(os.path.join(directory, name), columns=columns, engine="pyarrow")
@@ -1,116 +1,272 @@
-import requests
-from bs4 import BeautifulSoup
-import csv
+import lxml.etree
+import lxml.html
 import os
+import sqlite3
 import urllib.parse
-import time
-
-def scrape_tmz():
-    base_url = "https://www.tmz.com/search/?q="
-    celebrities = [
-        "Taylor Swift", "Kanye West", "MrBeast", "The Weeknd", "Justin Bieber",
-        "Jake Paul", "Cardi B", "Drake", "P Diddy", "Rihanna", "Billie Eilish",
-        "Will Smith", "Dwayne Johnson", "Ariana Grande", "Selena Gomez",
-        "Casey Neistat", "Joe Rogan", "Chris Brown", "Lady Gaga", "Kai Cenat"
-    ]
-    
-    articles = []
-    
-    for celebrity in celebrities:
-        search_url = base_url + urllib.parse.quote(celebrity)
-        response = requests.get(search_url)
-        if response.status_code != 200:
-            print(f"Failed to retrieve search results for {celebrity}")
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from scraping.fetcher import Fetcher
+    from scraping.article_index import ArticleIndex, SavedArticleKeys
+    from scraping.parquet_store import use_parquet, write_partition, TMZ_PARQUET_DIR, TMZ_COLUMNS
+except ImportError:  # when run directly as python scraping/tmz_scraper.py
+    from fetcher import Fetcher
+    from article_index import ArticleIndex, SavedArticleKeys
+    from parquet_store import use_parquet, write_partition, TMZ_PARQUET_DIR, TMZ_COLUMNS
+
+BASE_URL = "https://www.tmz.com"
+CELEBRITIES = [
+    "Taylor Swift", "Kanye West", "MrBeast", "The Weeknd", "Justin Bieber",
+    "Jake Paul", "Cardi B", "Drake", "P Diddy", "Rihanna", "Billie Eilish",
+    "Will Smith", "Dwayne Johnson", "Ariana Grande", "Selena Gomez",
+    "Casey Neistat", "Joe Rogan", "Chris Brown", "Lady Gaga", "Kai Cenat"
+]
+ARTICLES_PER_CELEBRITY = 10  # limit the articles to the first 10 for each celebrity
+
+# politeness budget and concurrency, can be tuned from the environment
+TMZ_RATE = float(os.getenv('TMZ_RATE', 2))              # requests per second to tmz.com
+TMZ_BURST = int(os.getenv('TMZ_BURST', 2))
+TMZ_WORKERS = int(os.getenv('TMZ_WORKERS', 8))          # requests in flight at once
+TMZ_TIMEOUT = float(os.getenv('TMZ_TIMEOUT', 15))
+TMZ_RETRIES = int(os.getenv('TMZ_RETRIES', 3))
+
+_default_fetcher = None
+
+def get_default_fetcher():
+    # one shared session for the whole run so connections to tmz.com are kept alive and reused
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher(rate=TMZ_RATE, burst=TMZ_BURST, retries=TMZ_RETRIES,
+                                   timeout=TMZ_TIMEOUT, max_connections=TMZ_WORKERS)
+    return _default_fetcher
+
+# the pages are parsed with lxml and the few elements we need are picked with XPath, which is much faster
+# than building a full BeautifulSoup tree and running CSS selectors over it (see benchmarks/tmz_extract.py)
+SEARCH_RESULT_XPATH = lxml.etree.XPath(
+    "//a[contains(concat(' ', normalize-space(@class), ' '), ' gridler__card-link ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' gridler__card-link--default ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' js-track-link ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' js-click-article ')]"
+)
+SEARCH_TITLE_XPATH = lxml.etree.XPath(
+    ".//h4[contains(concat(' ', normalize-space(@class), ' '), ' gridler__card-title ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' gridler__card-title--default ')][1]"
+)
+ARTICLE_SECTION_XPATH = lxml.etree.XPath(
+    "//section[starts-with(@id, 'cb-') and @data-context='{\"section\":\"permalink\",\"name\":\"text_block\"}'][1]"
+)
+
+def element_text(element):
+    # same as BeautifulSoup's get_text(strip=True): every text piece stripped and glued together.
+    # text inside <script>/<style> (inline ads, embeds) is code, not article text, so it's skipped
+    return "".join(text.strip() for text in element.xpath('.//text()[not(ancestor::script or ancestor::style)]'))
+
+def response_charset(response):
+    # the charset from the Content-Type header, None if the server didn't send one
+    # (response.encoding can't be used here, requests falls back to ISO-8859-1 for any text/html page)
+    for param in response.headers.get('Content-Type', '').split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            return value.strip().strip('"\'') or None
+    return None
+
+def parse_html(html, encoding=None):
+    # lxml only knows the charset of a byte page from a <meta charset> tag and takes Latin-1 otherwise.
+    # use the HTTP charset if there is one, else UTF-8 if the bytes are valid UTF-8 (what BeautifulSoup detected),
+    # else leave it to lxml. a parser is made per call, lxml parsers can't be shared between threads
+    if isinstance(html, bytes) and encoding is None:
+        try:
+            html.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            pass
+    if isinstance(html, bytes) and encoding is not None:
+        return lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding=encoding))
+    return lxml.html.fromstring(html)
+
+def parse_search_results(html, base_url=BASE_URL, encoding=None):
+    """Returns the (title, link) of the first articles on a TMZ search results page."""
+    if not html:
+        return []
+    tree = parse_html(html, encoding)
+
+    results = []
+    # Look for articles in search results
+    for item in SEARCH_RESULT_XPATH(tree):
+        if len(results) >= ARTICLES_PER_CELEBRITY:
+            break  # Stop after the first 10 articles
+
+        # Extract the title within the link
+        title_tags = SEARCH_TITLE_XPATH(item)
+        title = element_text(title_tags[0]) if title_tags else "No title"
+
+        # Get the link from the 'href' attribute
+        link = item.get('href')
+        if link is None:
             continue
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Counter to limit the articles to the first 10 for each celebrity
-        count = 0
-
-        # Look for articles in search results
-        for item in soup.select('a.gridler__card-link.gridler__card-link--default.js-track-link.js-click-article'):
-            if count >= 10:
-                break  # Stop after the first 10 articles
-
-            # Extract the title within the link
-            title_tag = item.select_one('h4.gridler__card-title.gridler__card-title--default')
-            title = title_tag.get_text(strip=True) if title_tag else "No title"
-            
-            # Get the link from the 'href' attribute
-            link = item['href']
-            if not link.startswith('http'):
-                link = "https://www.tmz.com" + link
-
-            #print(f"Celebrity: {celebrity}, Title: {title}, Link: {link}")  # Debugging print
-            
-            # Fetch the body content of the article
-            content = fetch_article_content(link)
-            #print(f"Content for {title}: {content[:100]}...")  # Preview content for debugging
-            
-            # Append the article data with the celebrity name
-            articles.append((celebrity, title, link, content))
-            
-            count += 1  # Increment the count for each article processed
-            time.sleep(1)  # Brief pause to avoid overwhelming the server
-    
+        if not link.startswith('http'):
+            link = base_url + link
+
+        results.append((title, link))
+    return results
+
+def parse_article_content(html, encoding=None):
+    """Returns the text of the article body, or None if the page has no article section."""
+    if not html:
+        return None
+    # Locate the section with the article content by the specified attributes
+    sections = ARTICLE_SECTION_XPATH(parse_html(html, encoding))
+    if not sections:
+        return None
+    # Extract the text within <p> tags inside the section
+    return " ".join(element_text(paragraph) for paragraph in sections[0].iter('p'))
+
+def fetch_search_results(celebrity, base_url=BASE_URL, fetcher=None, index=None):
+    """Returns the (title, link) of the first articles in the TMZ search results for a celebrity."""
+    fetcher = fetcher or get_default_fetcher()
+    search_url = base_url + "/search/?q=" + urllib.parse.quote(celebrity)
+
+    # search pages are checked on every run, but with a conditional request the server can answer
+    # 304 Not Modified and we reuse the results we parsed last time
+    headers = index.conditional_headers(search_url) if index is not None else None
+    response = fetcher.get(search_url, headers=headers or None)
+    if index is not None and response is not None and response.status_code == 304:
+        cached = index.cached_results(search_url)
+        if cached is not None:
+            index.count_not_modified()
+            return [tuple(result) for result in cached]
+        response = fetcher.get(search_url)  # nothing cached to reuse, get the full page
+
+    if response is None or response.status_code != 200:
+        print(f"Failed to retrieve search results for {celebrity}")
+        return []
+
+    results = parse_search_results(response.content, base_url, response_charset(response))
+    if index is not None:
+        index.record(search_url, response, results)
+        index.count_fetched()
+    return results
+
+def scrape_tmz(celebrities=CELEBRITIES, base_url=BASE_URL, fetcher=None, workers=TMZ_WORKERS, index=None, recheck_articles=False, on_article=None):
+    # search pages and articles are fetched concurrently on a thread pool, the per-host rate limit
+    # in the fetcher keeps the total request rate within the politeness budget.
+    # the result is in the same order as the serial version: celebrity by celebrity, in search order.
+    # with an index, articles fetched in earlier runs are skipped (or only re-checked with a conditional
+    # request if recheck_articles is True) and left out of the result.
+    # on_article is called with every article as soon as it is fetched, so a consumer can start on it straight away.
+    fetcher = fetcher or get_default_fetcher()
+    articles = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        search_futures = [executor.submit(fetch_search_results, celebrity, base_url, fetcher, index) for celebrity in celebrities]
+
+        # as soon as a celebrity's search results are in, queue the fetches of its articles
+        article_futures = []
+        for celebrity, search_future in zip(celebrities, search_futures):
+            for title, link in search_future.result():
+                # Fetch the body content of the article
+                if index is None:
+                    future = executor.submit(fetch_article_content, link, fetcher)
+                else:
+                    future = executor.submit(fetch_new_article_content, link, fetcher, index, recheck_articles)
+                article_futures.append((celebrity, title, link, future))
+
+        for celebrity, title, link, content_future in article_futures:
+            content = content_future.result()
+            if content is not None:
+                # Append the article data with the celebrity name
+                articles.append((celebrity, title, link, content))
+                if on_article is not None:
+                    on_article((celebrity, title, link, content))
+
     return articles
 
-def fetch_article_content(url):
-    """Fetches and returns the main content of an article given its URL."""
+def article_content_from_response(url, response):
+    """Returns the main content of an article from its HTTP response."""
     try:
-        response = requests.get(url)
-        if response.status_code != 200:
+        if response is None or response.status_code != 200:
             print(f"Failed to retrieve content from {url}")
             return "Failed to retrieve content"
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Locate the section with the article content by the specified attributes
-        content_section = soup.find('section', id=lambda x: x and x.startswith("cb-"), attrs={'data-context': '{"section":"permalink","name":"text_block"}'})
-        if not content_section:
+        content = parse_article_content(response.content, response_charset(response))
+        if content is None:
             print(f"Content section not found for {url}")
             return "Content section not found"
         
-        # Extract the text within <p> tags inside the section
-        content_paragraphs = content_section.find_all('p')
-        content = " ".join(paragraph.get_text(strip=True) for paragraph in content_paragraphs)
-        
         return content if content else "No content found"
     except Exception as e:
         print(f"Error fetching article content from {url}: {e}")
         return "Error retrieving content"
 
+def fetch_article_content(url, fetcher=None):
+    """Fetches and returns the main content of an article given its URL."""
+    fetcher = fetcher or get_default_fetcher()
+    return article_content_from_response(url, fetcher.get(url))
+
+def fetch_new_article_content(url, fetcher, index, recheck=False):
+    """Like fetch_article_content, but returns None if the article is already in the index or didn't change."""
+    if index.is_known(url) and not recheck:
+        index.count_skipped()
+        return None
+    response = fetcher.get(url, headers=index.conditional_headers(url) or None)
+    if response is not None and response.status_code == 304:
+        index.count_not_modified()
+        return None
+    content = article_content_from_response(url, response)
+    if response is not None and response.status_code == 200:
+        index.record(url, response)
+        index.count_fetched()
+    return content
+
 def save_to_csv(articles, filename="scraping/tmz_scraped.csv"):
+    # returns True once the articles are on disk (or there was nothing new), False if saving failed
     save_path = os.path.join(os.getcwd(), filename)
-    
-    # Load existing titles to avoid duplicates
-    existing_titles = set()
-    if os.path.exists(save_path):
-        with open(save_path, mode='r', newline='', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            existing_titles = {row[1].strip().lower() for row in reader}
-            #print("Existing titles loaded:", existing_titles)
-    
-    # Filter new articles based on titles not in existing_titles
-    new_articles = [article for article in articles if article[1].strip().lower() not in existing_titles]
-    
-    # Append only new articles to the CSV
-    if new_articles:
+
+    # new articles are checked against the on-disk key index (normalized URL and title hash)
+    # instead of re-reading the whole CSV every run
+    try:
+        saved_keys = SavedArticleKeys(save_path)
         try:
-            with open(save_path, mode='a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                for article in new_articles:
-                    writer.writerow(article)
-            #print(f"TMZ data appended to {save_path} with {len(new_articles)} new entries.")
-        except OSError as e:
-            print(f"Error saving data: {e}")
-    else:
+            new_articles = saved_keys.add(articles)
+        finally:
+            saved_keys.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error saving data: {e}")
+        return False
+
+    if not new_articles:
         print("No new articles to add.")
+    return True
 
-def main():
-    articles = scrape_tmz()
-    save_to_csv(articles)
+def save_to_parquet(articles, directory=TMZ_PARQUET_DIR):
+    # same return value as save_to_csv
+    try:
+        path = write_partition(articles, directory, TMZ_COLUMNS)
+    except (OSError, ImportError) as e:
+        print(f"Error saving data: {e}")
+        return False
+    if path is None:
+        print("No new articles to add.")
+    return True
+
+def main(on_article=None):
+    index = ArticleIndex()
+    try:
+        articles = scrape_tmz(index=index, on_article=on_article)
+        if use_parquet():
+            # one partition per run, the index already keeps known articles out of it
+            saved = save_to_parquet(articles)
+        else:
+            saved = save_to_csv(articles)
+        # only remember the fetched pages once the articles are safely saved,
+        # otherwise the next run would skip articles that never made it to disk
+        if saved:
+            index.commit()
+        else:
+            print("TMZ scrape: articles not saved, the fetched pages will be fetched again next run")
+        print(f"TMZ scrape: {index.report()}")
+    finally:
+        index.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
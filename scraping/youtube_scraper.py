@@ -1,9 +1,13 @@
 # import the necessary packages
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
 import pandas as pd
 from googleapiclient.errors import HttpError
 import os
+import json
+try:
+    from scraping.parquet_store import use_parquet, write_partition, YT_PARQUET_DIR, YT_COLUMNS
+except ImportError:  # when run directly as python scraping/youtube_scraper.py
+    from parquet_store import use_parquet, write_partition, YT_PARQUET_DIR, YT_COLUMNS
 #import seaborn as sns
 
 # set up the YouTube API
@@ -39,8 +43,24 @@ channel_ids = ['UCqECaJ8Gagnn7YCbPEzWH6g',
 api_service_name = "youtube"
 api_version = "v3"
 #client_secrets_file = "YOUR_CLIENT_SECRET_FILE.json"
-# creating the youtube variable that will be used to access the YouTube API
-youtube = build(api_service_name, api_version, developerKey=API_KEY)
+# optional discovery document saved on disk, e.g. to pin the API version or for older google-api-python-client releases
+DISCOVERY_FILE = os.getenv('YT_DISCOVERY_FILE', 'scraping/youtube_v3_discovery.json')
+
+# the client is only built when the scraper actually runs, so importing this module (main.py does)
+# doesn't fetch anything from the network
+_youtube = None
+
+def get_youtube_client():
+    global _youtube
+    if _youtube is None:
+        from googleapiclient.discovery import build, build_from_document
+        if os.path.exists(DISCOVERY_FILE):
+            with open(DISCOVERY_FILE, encoding='utf-8') as file:
+                _youtube = build_from_document(file.read(), developerKey=API_KEY)
+        else:
+            # static_discovery uses the discovery document shipped with the library instead of downloading it
+            _youtube = build(api_service_name, api_version, developerKey=API_KEY, static_discovery=True)
+    return _youtube
 
 
 # function to get the video statistics
@@ -55,86 +75,194 @@ def get_channel_stats(youtube, channel_ids):
     for i in range(len(response['items'])):
         # store the data in a dictionary
         data = dict(Name = response['items'][i]['snippet']['title'],
-                    playlist_id = response['items'][i]['contentDetails']['relatedPlaylists']['uploads'])
+                    playlist_id = response['items'][i]['contentDetails']['relatedPlaylists']['uploads'],
+                    channel_id = response['items'][i]['id'])
         data_list.append(data) # append the dictionary data to the data_list
     return data_list
 
-# Function to get the latest video link from a playlist
-def get_latest_video_link(youtube, playlist_id): # using the playlist id that we fetched earlier using the get_channel_stats function
-    request = youtube.playlistItems().list(
-        part="snippet",
-        playlistId=playlist_id,
-        maxResults=1
-    )
-    # getting the video id and title from the response
-    response = request.execute()
-    video_id = response['items'][0]['snippet']['resourceId']['videoId']
-    video_title = response['items'][0]['snippet']['title']
-    video_link = f"https://www.youtube.com/watch?v={video_id}" # creating the video link using the video id
-    return video_title, video_link
-
-# function to get the top comments from the latest video
-# def get_top_comments(youtube, video_id): # using the video id that we fetched earlier using the get_latest_video_link function
-#     request = youtube.commentThreads().list(
-#         part="snippet",
-#         videoId=video_id,
-#         maxResults=10, # we can tweak this number to get more or less comments
-#         order="relevance" # getting the top comments based on relevance
-#     )
-#     response = request.execute()
-#     comments_data = []
-#     # loop through the response and store the top comments in the comments_data list
-#     for item in response['items']:
-#         comment = item['snippet']['topLevelComment']['snippet']['textDisplay']
-#         comments_data.append(comment) # append the comment only to the comments_data list
-#     return comments_data
-
-
-
-def get_top_comments(youtube, video_id):
-    try:
-        request = youtube.commentThreads().list(
-            part="snippet",
-            videoId=video_id,
-            maxResults=10,
-            order="relevance"
-        )
-        response = request.execute()
-        comments_data = []
-        for item in response['items']:
-            comment = item['snippet']['topLevelComment']['snippet']['textDisplay']
-            comments_data.append(comment)
-        return comments_data
-    except HttpError as e:
-        # Handle the specific case where comments are disabled
-        if e.resp.status == 403:
-            print(f"Comments disabled for video ID: {video_id}")
-            return []  # Return an empty list if comments are disabled
+# settings for the incremental collector
+STATE_FILE = 'scraping/yt_state.json'     # per channel: uploads playlist, last video id, last comment timestamp, resume page token
+OUTPUT_FILE = 'scraping/yt_scraped.csv'
+COMMENT_PAGE_SIZE = 100                   # maximum allowed by commentThreads().list
+YT_COMMENT_PAGES = int(os.getenv('YT_COMMENT_PAGES', 1))          # how many pages of comments to read per video
+YT_QUOTA_BUDGET = int(os.getenv('YT_QUOTA_BUDGET', 10000))        # quota units one run may spend
+BATCH_SIZE = 50                           # the API accepts at most 50 calls in one batch request
+
+class QuotaTracker:
+    """Counts the API quota units a run spends. channels, playlistItems and commentThreads list calls cost 1 unit each."""
+
+    def __init__(self, budget=YT_QUOTA_BUDGET):
+        self.budget = budget
+        self.units = 0
+
+    def spend(self, units):
+        # returns False (and spends nothing) if the calls would go over the budget
+        if self.units + units > self.budget:
+            return False
+        self.units += units
+        return True
+
+def execute_batched(youtube, requests, quota):
+    """
+    Sends the (key, request) pairs in batch requests of up to 50 calls.
+    Returns a dict key -> (response, exception). Calls that didn't fit in the quota budget are left out.
+    """
+    results = {}
+    for start in range(0, len(requests), BATCH_SIZE):
+        chunk = requests[start:start + BATCH_SIZE]
+        if not quota.spend(len(chunk)):
+            print(f"YouTube quota budget of {quota.budget} units reached, skipping {len(requests) - start} calls.")
+            break
+
+        def callback(request_id, response, exception):
+            results[chunk[int(request_id)][0]] = (response, exception)
+
+        batch = youtube.new_batch_http_request(callback=callback)
+        for i, (_, request) in enumerate(chunk):
+            batch.add(request, request_id=str(i))
+        batch.execute()
+    return results
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_state(state, path=STATE_FILE):
+    # write to a temporary file first so a crash never leaves a half written state file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=2)
+    os.replace(tmp_path, path)
+
+def collect_new_comments(youtube, channel_ids, state, quota, max_comment_pages=YT_COMMENT_PAGES, on_rows=None):
+    """
+    Fetches the comments posted on each channel's latest video since the last run.
+    All channels are handled together: every step is one batch request covering all of them.
+    Updates state in place and returns the new rows (Name, Title, URL, comment).
+    on_rows is called with the new rows of every page of comments as soon as the page is in.
+    """
+    # 1. channel name and uploads playlist, only asked for channels we haven't seen before
+    unknown = [channel_id for channel_id in channel_ids if channel_id not in state]
+    if unknown and quota.spend(1):
+        for channel in get_channel_stats(youtube, unknown):
+            state[channel['channel_id']] = {'Name': channel['Name'], 'playlist_id': channel['playlist_id']}
+    channels = [channel_id for channel_id in channel_ids if channel_id in state]
+
+    # 2. latest video of every channel
+    latest = execute_batched(youtube, [
+        (channel_id, youtube.playlistItems().list(part="snippet", playlistId=state[channel_id]['playlist_id'], maxResults=1))
+        for channel_id in channels
+    ], quota)
+
+    videos = {}
+    for channel_id, (response, exception) in latest.items():
+        if exception is not None or not response.get('items'):
+            print(f"Could not get the latest video for channel {channel_id}: {exception}")
+            continue
+        snippet = response['items'][0]['snippet']
+        video_id = snippet['resourceId']['videoId']
+        channel_state = state[channel_id]
+        same_video = channel_state.get('last_video_id') == video_id
+        # same video as last run: only comments newer than the last one we saw are new
+        since = channel_state.get('last_comment_published') if same_video else None
+        # a run that stopped before reaching `since` left a page token, carry on from there first
+        page_token = channel_state.get('page_token') if same_video else None
+        newest = channel_state.get('resume_newest') if page_token else None
+        videos[channel_id] = {'video_id': video_id, 'title': snippet['title'], 'since': since, 'newest': newest,
+                              'page_token': page_token, 'complete': False}
+
+    # 3. comments, newest first, page by page until we reach comments we already have or the page limit
+    rows = []
+    active = list(videos)
+    for _ in range(max_comment_pages):
+        if not active:
+            break
+        requests = []
+        for channel_id in active:
+            video = videos[channel_id]
+            params = dict(part="snippet", videoId=video['video_id'], maxResults=COMMENT_PAGE_SIZE, order="time")
+            if video['page_token']:
+                params['pageToken'] = video['page_token']
+            requests.append((channel_id, youtube.commentThreads().list(**params)))
+        responses = execute_batched(youtube, requests, quota)
+
+        next_active = []
+        page_start = len(rows)
+        for channel_id in active:
+            if channel_id not in responses:
+                continue  # over the quota budget
+            response, exception = responses[channel_id]
+            video = videos[channel_id]
+            if exception is not None:
+                if isinstance(exception, HttpError) and exception.resp.status == 403:
+                    print(f"Comments disabled for video ID: {video['video_id']}")
+                    video['complete'] = True  # nothing to catch up on
+                else:
+                    # page_token still points at the page that failed, the next run retries it
+                    print(f"Error fetching comments for video ID {video['video_id']}: {exception}")
+                continue
+
+            reached_known = False
+            for item in response.get('items', []):
+                comment = item['snippet']['topLevelComment']['snippet']
+                if video['since'] is not None and comment['publishedAt'] <= video['since']:
+                    reached_known = True
+                    break
+                if video['newest'] is None or comment['publishedAt'] > video['newest']:
+                    video['newest'] = comment['publishedAt']
+                rows.append({
+                    'Name': state[channel_id]['Name'],
+                    'Title': video['title'],
+                    'URL': f"https://www.youtube.com/watch?v={video['video_id']}",
+                    'comment': comment['textDisplay']
+                })
+            video['page_token'] = response.get('nextPageToken')
+            if reached_known or not video['page_token']:
+                video['complete'] = True
+            else:
+                next_active.append(channel_id)
+        if on_rows is not None and len(rows) > page_start:
+            on_rows(rows[page_start:])
+        active = next_active
+
+    # the watermark only moves once everything between it and the newest comment was read. if the page limit,
+    # the quota or an error stopped the paging first, the page token is kept and the next run continues from it
+    # (comments posted in the meantime are picked up by the run after that, they're newer than resume_newest)
+    for channel_id, video in videos.items():
+        channel_state = state[channel_id]
+        channel_state['last_video_id'] = video['video_id']
+        if video['complete']:
+            seen = [published for published in (video['since'], video['newest']) if published is not None]
+            channel_state['last_comment_published'] = max(seen) if seen else None
+            channel_state.pop('page_token', None)
+            channel_state.pop('resume_newest', None)
         else:
-            raise  # Re-raise unexpected errors to be handled elsewhere
-
-#main code to fetch data and merge into a single DataFrame
-def main():
-    channel_data = get_channel_stats(youtube, channel_ids)
-    final_data = []
-
-    for channel in channel_data:
-        video_title, latest_video_link = get_latest_video_link(youtube, channel['playlist_id'])
-        top_comments = get_top_comments(youtube, latest_video_link.split('=')[-1])
-        
-        #add each comment with channel info to final data
-        for comment in top_comments:
-            final_data.append({
-                'Name': channel['Name'],
-                'Title': video_title,
-                'URL': latest_video_link,
-                'comment': comment
-            })
-
-    # Convert the final data to a DataFrame and save to CSV
-    final_df = pd.DataFrame(final_data)
-    final_df.to_csv('scraping/yt_scraped.csv', index=False)
-    print("YouTube data scraped and saved to yt_scraped.csv.")
+            channel_state['last_comment_published'] = video['since']
+            channel_state['page_token'] = video['page_token']
+            channel_state['resume_newest'] = video['newest']
+    return rows
+
+#main code to fetch the new comments and append them to the CSV
+def main(on_rows=None):
+    state = load_state()
+    quota = QuotaTracker()
+    rows = collect_new_comments(get_youtube_client(), channel_ids, state, quota, on_rows=on_rows)
+
+    if use_parquet():
+        # one partition file per run
+        write_partition(rows, YT_PARQUET_DIR, YT_COLUMNS)
+        destination = YT_PARQUET_DIR
+    else:
+        # append the new comments instead of overwriting the file, main.py skips rows it already stored
+        if rows:
+            final_df = pd.DataFrame(rows, columns=YT_COLUMNS)
+            final_df.to_csv(OUTPUT_FILE, mode='a', index=False, header=not os.path.exists(OUTPUT_FILE))
+        destination = OUTPUT_FILE
+    # the state is only saved once the comments are written, so a crash means they're fetched again
+    save_state(state)
+    print(f"YouTube data scraped: {len(rows)} new comments saved to {destination}, {quota.units} quota units used.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
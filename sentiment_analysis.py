@@ -1,21 +1,44 @@
 # sentiment analysis using TextBlob
 
 # import the required libraries
-from textblob import TextBlob
 import os
+import hashlib
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
 from dotenv import load_dotenv
 import sqlalchemy
-from sqlalchemy import update, MetaData, Table
+from sqlalchemy import update, case
+from cache import read_cache
+from db_pool import get_engine, get_table
 load_dotenv()
 
 # first we going to get the data from our database using the sqlalchemy.
-# creating a connection to the database.
-engine = sqlalchemy.create_engine(f'mysql+pymysql://{os.getenv("DB_USER")}:{os.getenv("DB_PASS")}@{os.getenv("DB_HOST")}/{os.getenv("DB_NAME")}')
+# the engine is shared with vibescore (db_pool.get_engine) and only created when a job first needs it.
+
+# the scoring itself is CPU bound, so texts are split into chunks and scored on a pool of worker processes
+SENTIMENT_WORKERS = int(os.getenv('SENTIMENT_WORKERS', os.cpu_count() or 1))
+SENTIMENT_CHUNK_SIZE = int(os.getenv('SENTIMENT_CHUNK_SIZE', 500))
+# number of rows written per UPDATE statement
+SENTIMENT_WRITE_BATCH_SIZE = int(os.getenv('SENTIMENT_WRITE_BATCH_SIZE', 1000))
 
 def get_data_from_table(table_name):
     # Fetch data from the given table using SQLAlchemy.
-    return pd.read_sql_table(table_name, engine)
+    return pd.read_sql_table(table_name, get_engine())
+
+def get_rows_to_score(table_name, text_column):
+    # Fetch only the rows that need a (new) sentiment score instead of the whole table.
+    # needs_score is a stored generated column (see main.py) that MySQL keeps up to date on every write:
+    # it is 1 for rows that were never scored and for rows whose text changed after they were scored
+    # (sentiment_hash no longer matches SHA1 of the text). it is indexed, so a run only reads those rows.
+    query = sqlalchemy.text(f"SELECT id, {text_column} FROM {table_name} WHERE needs_score = 1")
+    return pd.read_sql(query, get_engine())
+
+def text_hash(text):
+    # same value as MySQL's SHA1() on the stored (utf8) text, so the two can be compared in SQL
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
 
 # we are going to use the TextBlob library to perform sentiment analysis on the news articles.
 # we are going to create a function that will take the news article as input and return the sentiment of the article.
@@ -28,42 +51,131 @@ def assign_score(polarity):
     else:
         return 5  
 
-def perform_sentiment_analysis(dataframe, text_column):
-    dataframe['polarity'] = dataframe[text_column].apply(lambda x: TextBlob(x).sentiment.polarity) # we are going to use the apply function to apply the TextBlob function to each article in the News dataframe.
-    dataframe['sentiment_score'] = dataframe['polarity'].apply(assign_score) # we are going to use the apply function to apply the assign_score function to each polarity value in the News dataframe.
-    dataframe.drop(columns=['polarity'], inplace=True)  # Drop polarity column after use
+def score_chunk(texts):
+    # runs inside a worker process: TextBlob polarity mapped to the 1-10 scale with assign_score.
+    # TextBlob (and nltk behind it) is slow to import, so it is only imported once scoring actually starts
+    from textblob import TextBlob
+    return [assign_score(TextBlob(text).sentiment.polarity) for text in texts]
+
+_executor = None
+_executor_workers = None
+
+def get_sentiment_executor(workers):
+    # the worker processes are started once and reused by every run.
+    # spawn is used because the API process has threads running, which doesn't mix well with fork.
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _executor_workers = workers
+    return _executor
+
+def reset_sentiment_executor():
+    # a broken pool can't run anything anymore, drop it so the next run starts fresh worker processes
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _executor_workers = None
+
+def score_texts_in_chunks(texts, workers=None, chunk_size=None):
+    # yields (offset, scores) for each chunk of texts as soon as it is scored, so the caller can
+    # write results while the other chunks are still being scored. chunks can finish out of order.
+    workers = workers or SENTIMENT_WORKERS
+    chunk_size = chunk_size or SENTIMENT_CHUNK_SIZE
+    chunks = ((start, texts[start:start + chunk_size]) for start in range(0, len(texts), chunk_size))
+
+    # a single chunk or a single worker is not worth the inter-process overhead
+    if workers <= 1 or len(texts) <= chunk_size:
+        for start, chunk in chunks:
+            yield start, score_chunk(chunk)
+        return
+
+    scored = set()  # offsets already yielded
+    try:
+        executor = get_sentiment_executor(workers)
+        # keep only a couple of chunks per worker in flight so memory stays bounded on big backfills
+        pending = {executor.submit(score_chunk, chunk): start for start, chunk in itertools.islice(chunks, workers * 2)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                scores = future.result()
+                start = pending.pop(future)
+                scored.add(start)
+                yield start, scores
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending[executor.submit(score_chunk, next_chunk[1])] = next_chunk[0]
+    except BrokenProcessPool as e:
+        # a worker process died (killed for memory, crashed...) and took the whole pool with it.
+        # the next run gets a new pool, the chunks that weren't scored yet are scored in this process
+        print(f"Sentiment worker pool broke, scoring the remaining texts in-process: {e}")
+        reset_sentiment_executor()
+        for start in range(0, len(texts), chunk_size):
+            if start not in scored:
+                yield start, score_chunk(texts[start:start + chunk_size])
+
+def perform_sentiment_analysis(dataframe, text_column, workers=None):
+    dataframe['sentiment_hash'] = dataframe[text_column].apply(text_hash) # remember which text the score belongs to
+    texts = dataframe[text_column].tolist()
+    scores = [None] * len(texts)
+    for start, chunk_scores in score_texts_in_chunks(texts, workers):
+        scores[start:start + len(chunk_scores)] = chunk_scores
+    dataframe['sentiment_score'] = scores
     return dataframe
 
-def update_sentiment_scores(table_name, dataframe):
-    # now we going to update the News table in the database with the sentiment scores.
-    metadata = MetaData()
-    metadata.reflect(engine)
-    
-    # Get reference to the target table
-    target_table = Table(table_name, metadata, autoload_with=engine)
-
-    with engine.begin() as conn:
-        for index, row in dataframe.iterrows():
-            print(f"Updating id {row['id']} with sentiment_score {row['sentiment_score']}")
-            # Create an update statement for each row based on its 'id'
+def score_and_update(table_name, dataframe, text_column, workers=None):
+    # score the texts chunk by chunk and write every chunk to the database as soon as it is ready.
+    # returns the number of rows updated
+    texts = dataframe[text_column].tolist()
+    updated = 0
+    for start, chunk_scores in score_texts_in_chunks(texts, workers):
+        chunk = dataframe.iloc[start:start + len(chunk_scores)][['id', text_column]].copy()
+        chunk['sentiment_hash'] = chunk[text_column].apply(text_hash)
+        chunk['sentiment_score'] = chunk_scores
+        update_sentiment_scores(table_name, chunk)
+        updated += len(chunk)
+    return updated
+
+def update_sentiment_scores(table_name, dataframe, batch_size=None):
+    # now we going to update the table in the database with the sentiment scores.
+    # instead of one UPDATE per row, every batch is sent as a single statement:
+    #   UPDATE News SET sentiment_score = CASE id WHEN 1 THEN 7 WHEN 2 THEN 4 ... END, sentiment_hash = CASE ... END
+    #   WHERE id IN (1, 2, ...)
+    batch_size = batch_size or SENTIMENT_WRITE_BATCH_SIZE
+    target_table = get_table(table_name)
+    ids = [int(i) for i in dataframe['id']]
+    scores = [int(score) for score in dataframe['sentiment_score']]
+    hashes = dataframe['sentiment_hash'].tolist()
+
+    with get_engine().begin() as conn:
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
             stmt = (
                 update(target_table)
-                .where(target_table.c.id == row['id'])  # Match by 'id'
-                .values(sentiment_score=row['sentiment_score'])  # Update only 'sentiment_score'
+                .where(target_table.c.id.in_(batch_ids))
+                .values(
+                    sentiment_score=case(dict(zip(batch_ids, scores[start:start + batch_size])), value=target_table.c.id),
+                    sentiment_hash=case(dict(zip(batch_ids, hashes[start:start + batch_size])), value=target_table.c.id),
+                )
             )
             conn.execute(stmt)
 
 def analyze_and_update_news():
-    # Perform sentiment analysis on the 'News' table and update the database.
-    news_data = get_data_from_table('News')
-    analyzed_news = perform_sentiment_analysis(news_data, 'article')
-    update_sentiment_scores('News', analyzed_news)
-    print("Sentiment analysis for news articles is complete and scores updated.")
+    # Perform sentiment analysis on the new or changed rows of the 'News' table and update the database.
+    news_data = get_rows_to_score('News', 'article')
+    if news_data.empty:
+        return
+    updated = score_and_update('News', news_data, 'article')
+    read_cache.invalidate('News')
+    print(f"Sentiment analysis for {updated} news articles is complete and scores updated.")
 
 def analyze_and_update_videos():
-    # Perform sentiment analysis on the 'Videos' table and update the database.
-    video_data = get_data_from_table('Videos')
-    analyzed_videos = perform_sentiment_analysis(video_data, 'comment')
-    update_sentiment_scores('Videos', analyzed_videos)
-    print("Sentiment analysis for YouTube comments is complete and scores updated.")
-
+    # Perform sentiment analysis on the new or changed rows of the 'Videos' table and update the database.
+    video_data = get_rows_to_score('Videos', 'comment')
+    if video_data.empty:
+        return
+    updated = score_and_update('Videos', video_data, 'comment')
+    read_cache.invalidate('Videos')
+    print(f"Sentiment analysis for {updated} YouTube comments is complete and scores updated.")
@@ -0,0 +1,254 @@
+# tests for the incremental YouTube collector in scraping/youtube_scraper.py, run with: python -m pytest test_youtube_scraper.py
+# the API is replaced by FakeYouTube, a local fake of the discovery client, so nothing goes over the network
+
+import os
+import tempfile
+import unittest
+import httplib2
+from googleapiclient.errors import HttpError
+from scraping.youtube_scraper import (QuotaTracker, execute_batched, collect_new_comments, load_state, save_state,
+                                      BATCH_SIZE, COMMENT_PAGE_SIZE)
+
+
+class FakeRequest:
+    def __init__(self, youtube, method, params):
+        self.youtube = youtube
+        self.method = method
+        self.params = params
+
+    def execute(self):
+        # only channels().list is sent on its own, everything else goes through a batch
+        self.youtube.single_calls.append(self.method)
+        return self.youtube.respond(self.method, self.params)
+
+
+class FakeResource:
+    def __init__(self, youtube, name):
+        self.youtube = youtube
+        self.name = name
+
+    def list(self, **params):
+        return FakeRequest(self.youtube, self.name, params)
+
+
+class FakeBatch:
+    def __init__(self, youtube, callback):
+        self.youtube = youtube
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        assert len(self.requests) <= BATCH_SIZE
+        self.youtube.batches.append([request.method for _, request in self.requests])
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, self.youtube.respond(request.method, request.params), None)
+            except HttpError as e:
+                self.callback(request_id, None, e)
+
+
+class FakeYouTube:
+    """
+    channels: channel id -> (name, video id, video title).
+    comments: video id -> list of (publishedAt, text), newest first like order="time".
+    """
+
+    def __init__(self, channels, comments=None, disabled=()):
+        self.channels_data = channels
+        self.comments = comments or {}
+        self.disabled = set(disabled)
+        self.batches = []
+        self.single_calls = []
+
+    def channels(self):
+        return FakeResource(self, "channels")
+
+    def playlistItems(self):
+        return FakeResource(self, "playlistItems")
+
+    def commentThreads(self):
+        return FakeResource(self, "commentThreads")
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def respond(self, method, params):
+        if method == "channels":
+            return {"items": [
+                {"id": channel_id, "snippet": {"title": self.channels_data[channel_id][0]},
+                 "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel_id}}}
+                for channel_id in params["id"].split(",")
+            ]}
+        if method == "playlistItems":
+            _, video_id, title = self.channels_data[params["playlistId"][2:]]
+            return {"items": [{"snippet": {"title": title, "resourceId": {"videoId": video_id}}}]}
+        video_id = params["videoId"]
+        if video_id in self.disabled:
+            raise HttpError(httplib2.Response({"status": 403}), b"commentsDisabled")
+        assert params["order"] == "time"
+        start = int(params.get("pageToken", 0))
+        page = self.comments.get(video_id, [])[start:start + params["maxResults"]]
+        response = {"items": [
+            {"snippet": {"topLevelComment": {"snippet": {"publishedAt": published, "textDisplay": text}}}}
+            for published, text in page
+        ]}
+        if start + params["maxResults"] < len(self.comments.get(video_id, [])):
+            response["nextPageToken"] = str(start + params["maxResults"])
+        return response
+
+    def post(self, video_id, count, start):
+        # count new comments on a video, timestamps start, start + 1, ... seconds
+        new = [(f"2024-01-01T00:{(start + i) // 60:02d}:{(start + i) % 60:02d}Z", f"comment {start + i}") for i in range(count)]
+        self.comments[video_id] = list(reversed(new)) + self.comments.get(video_id, [])
+
+
+def comment_texts(rows):
+    return {row["comment"] for row in rows}
+
+
+class ExecuteBatchedTest(unittest.TestCase):
+    def test_splits_into_batches_of_50(self):
+        youtube = FakeYouTube({f"c{i}": (f"Channel {i}", f"v{i}", "title") for i in range(120)})
+        quota = QuotaTracker(budget=1000)
+        requests = [(f"c{i}", youtube.playlistItems().list(part="snippet", playlistId=f"UUc{i}", maxResults=1)) for i in range(120)]
+        results = execute_batched(youtube, requests, quota)
+        self.assertEqual([len(batch) for batch in youtube.batches], [50, 50, 20])
+        self.assertEqual(set(results), {f"c{i}" for i in range(120)})
+        self.assertEqual(results["c7"][0]["items"][0]["snippet"]["resourceId"]["videoId"], "v7")
+        self.assertEqual(quota.units, 120)
+
+    def test_stops_at_the_quota_budget(self):
+        youtube = FakeYouTube({f"c{i}": (f"Channel {i}", f"v{i}", "title") for i in range(120)})
+        quota = QuotaTracker(budget=60)
+        requests = [(f"c{i}", youtube.playlistItems().list(part="snippet", playlistId=f"UUc{i}", maxResults=1)) for i in range(120)]
+        results = execute_batched(youtube, requests, quota)
+        self.assertEqual(len(youtube.batches), 1)
+        self.assertEqual(len(results), 50)
+        self.assertEqual(quota.units, 50)
+
+    def test_errors_are_returned_per_call(self):
+        youtube = FakeYouTube({"c1": ("One", "v1", "title")}, disabled={"v1"})
+        results = execute_batched(youtube, [("c1", youtube.commentThreads().list(part="snippet", videoId="v1", maxResults=100, order="time"))],
+                                  QuotaTracker())
+        response, exception = results["c1"]
+        self.assertIsNone(response)
+        self.assertEqual(exception.resp.status, 403)
+
+
+class CollectNewCommentsTest(unittest.TestCase):
+    def setUp(self):
+        self.youtube = FakeYouTube({"c1": ("One", "v1", "First"), "c2": ("Two", "v2", "Second"), "c3": ("Three", "v3", "Third")})
+        for video_id in ("v1", "v2", "v3"):
+            self.youtube.post(video_id, 5, 0)
+
+    def test_first_run_batches_every_step(self):
+        state = {}
+        quota = QuotaTracker()
+        rows = collect_new_comments(self.youtube, ["c1", "c2", "c3"], state, quota, max_comment_pages=1)
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(self.youtube.single_calls, ["channels"])
+        self.assertEqual(self.youtube.batches, [["playlistItems"] * 3, ["commentThreads"] * 3])
+        self.assertEqual(quota.units, 1 + 3 + 3)
+        self.assertEqual(rows[0], {"Name": "One", "Title": "First", "URL": "https://www.youtube.com/watch?v=v1", "comment": "comment 4"})
+        self.assertEqual(state["c1"]["last_video_id"], "v1")
+        self.assertEqual(state["c1"]["last_comment_published"], "2024-01-01T00:00:04Z")
+        self.assertNotIn("page_token", state["c1"])
+
+    def test_rerun_fetches_only_new_comments(self):
+        state = {}
+        collect_new_comments(self.youtube, ["c1", "c2", "c3"], state, QuotaTracker(), max_comment_pages=1)
+        self.youtube.post("v2", 3, 5)
+        quota = QuotaTracker()
+        rows = collect_new_comments(self.youtube, ["c1", "c2", "c3"], state, quota, max_comment_pages=1)
+        self.assertEqual(comment_texts(rows), {"comment 5", "comment 6", "comment 7"})
+        self.assertEqual(quota.units, 3 + 3)  # channels are known, no channels().list call
+        self.assertEqual(state["c2"]["last_comment_published"], "2024-01-01T00:00:07Z")
+        self.assertEqual(state["c1"]["last_comment_published"], "2024-01-01T00:00:04Z")
+
+    def test_pages_until_known_comments(self):
+        state = {}
+        collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=5)
+        self.youtube.post("v1", 2 * COMMENT_PAGE_SIZE + 10, 5)
+        rows = collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=5)
+        self.assertEqual(len(rows), 2 * COMMENT_PAGE_SIZE + 10)
+        self.assertEqual(len(self.youtube.batches[-3:]), 3)
+        self.assertNotIn("page_token", state["c1"])
+
+    def test_page_limit_keeps_the_watermark_and_resumes(self):
+        state = {}
+        collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+        watermark = state["c1"]["last_comment_published"]
+        self.youtube.post("v1", 2 * COMMENT_PAGE_SIZE + 50, 5)
+        newest = self.youtube.comments["v1"][0][0]
+
+        first = collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+        self.assertEqual(len(first), COMMENT_PAGE_SIZE)
+        self.assertEqual(state["c1"]["last_comment_published"], watermark)
+        self.assertEqual(state["c1"]["page_token"], str(COMMENT_PAGE_SIZE))
+        self.assertEqual(state["c1"]["resume_newest"], newest)
+
+        # comments posted while we are catching up are left for the run after the backlog is done
+        self.youtube.post("v1", 3, 400)
+        second = collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+        third = collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+        self.assertEqual(state["c1"]["last_comment_published"], newest)
+        self.assertNotIn("page_token", state["c1"])
+        fourth = collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+
+        expected = {f"comment {i}" for i in range(5, 5 + 2 * COMMENT_PAGE_SIZE + 50)} | {"comment 400", "comment 401", "comment 402"}
+        self.assertEqual(comment_texts(first + second + third + fourth), expected)
+
+    def test_quota_cutoff_keeps_the_state(self):
+        state = {}
+        collect_new_comments(self.youtube, ["c1", "c2", "c3"], state, QuotaTracker(), max_comment_pages=1)
+        before = {channel_id: dict(channel_state) for channel_id, channel_state in state.items()}
+        self.youtube.post("v1", 4, 5)
+        quota = QuotaTracker(budget=3)  # enough for the playlistItems batch, not for the comments
+        rows = collect_new_comments(self.youtube, ["c1", "c2", "c3"], state, quota, max_comment_pages=1)
+        self.assertEqual(rows, [])
+        self.assertEqual(quota.units, 3)
+        self.assertEqual(state["c1"]["last_comment_published"], before["c1"]["last_comment_published"])
+        self.assertIsNone(state["c1"]["page_token"])
+        # with quota again the comments are still there to fetch
+        rows = collect_new_comments(self.youtube, ["c1", "c2", "c3"], state, QuotaTracker(), max_comment_pages=1)
+        self.assertEqual(comment_texts(rows), {"comment 5", "comment 6", "comment 7", "comment 8"})
+
+    def test_new_video_starts_over(self):
+        state = {}
+        collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+        self.youtube.channels_data["c1"] = ("One", "v9", "Newer")
+        self.youtube.post("v9", 2, 0)
+        rows = collect_new_comments(self.youtube, ["c1"], state, QuotaTracker(), max_comment_pages=1)
+        self.assertEqual([row["URL"] for row in rows], ["https://www.youtube.com/watch?v=v9"] * 2)
+        self.assertEqual(state["c1"]["last_video_id"], "v9")
+
+    def test_comments_disabled(self):
+        self.youtube.disabled.add("v2")
+        state = {}
+        rows = collect_new_comments(self.youtube, ["c1", "c2"], state, QuotaTracker(), max_comment_pages=1)
+        self.assertEqual({row["Name"] for row in rows}, {"One"})
+        self.assertIsNone(state["c2"]["last_comment_published"])
+        self.assertNotIn("page_token", state["c2"])
+
+    def test_on_rows_gets_every_page(self):
+        pages = []
+        rows = collect_new_comments(self.youtube, ["c1", "c2"], {}, QuotaTracker(), max_comment_pages=1, on_rows=pages.append)
+        self.assertEqual(pages, [rows])
+
+
+class StateFileTest(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "yt_state.json")
+            self.assertEqual(load_state(path), {})
+            state = {"c1": {"Name": "One", "playlist_id": "UUc1", "last_video_id": "v1", "page_token": "100"}}
+            save_state(state, path)
+            self.assertEqual(load_state(path), state)
+            self.assertFalse(os.path.exists(path + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,41 +1,18 @@
 # import the necessary libraries
-import os
 import pandas as pd
-import math
 from dotenv import load_dotenv
 import sqlalchemy
-from sqlalchemy import update, MetaData, Table
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy import update, case
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy.orm import declarative_base
+from cache import read_cache
+from leaderboard import leaderboard
+from db_pool import get_engine, get_table
 load_dotenv()
 
 
-# create a connection to the database
-engine = sqlalchemy.create_engine(f'mysql+pymysql://{os.getenv("DB_USER")}:{os.getenv("DB_PASS")}@{os.getenv("DB_HOST")}/{os.getenv("DB_NAME")}')
-SessionLocal = sessionmaker(bind=engine) # create a sessionmaker object so that we can create a session to interact with the database.
-session = SessionLocal() # sessionLocal object to create a session and we can interact with the database locally.
-
-# Reflect existing database tables
-metadata = MetaData()
-metadata.reflect(bind=engine)
-
-# Define references to tables
-news_table = Table('News', metadata, autoload_with=engine)
-videos_table = Table('Videos', metadata, autoload_with=engine)
-votes_table = Table('Votes', metadata, autoload_with=engine)
-influencers_table = Table('Influencers', metadata, autoload_with=engine)
-
-# Query data from News, Videos, and Votes tables
-news_query = session.query(news_table).all()
-videos_query = session.query(videos_table).all()
-votes_query = session.query(votes_table).all()
-
-# Initializing the dataframes for News, Videos, Votes, and Influencers
-Influencer = pd.read_sql_table('Influencers', engine)
-News = pd.read_sql_table('News', engine)
-Videos = pd.read_sql_table('Videos', engine)
-Votes = pd.read_sql_table('Votes', engine)
+# the database engine and table metadata are shared with sentiment_analysis (db_pool.get_engine / get_table)
+# and created on first use, so importing this module does not touch the database.
 
 # Define the base for your models
 Base = declarative_base()
@@ -76,12 +53,6 @@ class Vote(Base):
     good_vote = Column(Integer)
     bad_vote = Column(Integer)
 
-
-# convert the query results into pandas dataframes
-News = pd.DataFrame([row._asdict() for row in news_query])
-Videos = pd.DataFrame([row._asdict() for row in videos_query])
-Votes = pd.DataFrame([row._asdict() for row in votes_query])
-
 # Define a function to calculate vote_score
 def calculate_vote_score(good_vote, bad_vote):
     total_vote = good_vote + bad_vote
@@ -101,59 +72,124 @@ def get_data_as_dataframe(table_name):
     """
     Fetch data from a table and return it as a Pandas DataFrame.
     """
-    return pd.read_sql_table(table_name, engine)
+    return pd.read_sql_table(table_name, get_engine())
+
+# per influencer vote counts and average sentiment of their news and videos.
+# the averages are computed by MySQL with GROUP BY, so only one small row per influencer is sent back
+# instead of every article and comment.
+VIBE_INPUTS_QUERY = """
+SELECT v.id, v.influencer_id, v.good_vote, v.bad_vote,
+       n.avg_sentiment AS avg_news_sentiment,
+       vi.avg_sentiment AS avg_video_sentiment
+FROM Votes v
+LEFT JOIN (SELECT influencer_id, AVG(sentiment_score) AS avg_sentiment FROM News GROUP BY influencer_id) n
+    ON n.influencer_id = v.influencer_id
+LEFT JOIN (SELECT influencer_id, AVG(sentiment_score) AS avg_sentiment FROM Videos GROUP BY influencer_id) vi
+    ON vi.influencer_id = v.influencer_id
+ORDER BY v.id
+"""
+
+# the same inputs for a given list of influencers, every part is an influencer_id index range lookup
+SELECTED_VIBE_INPUTS_QUERY = sqlalchemy.text("""
+SELECT v.id, v.influencer_id, v.good_vote, v.bad_vote,
+       n.avg_sentiment AS avg_news_sentiment,
+       vi.avg_sentiment AS avg_video_sentiment
+FROM Votes v
+LEFT JOIN (SELECT influencer_id, AVG(sentiment_score) AS avg_sentiment FROM News
+           WHERE influencer_id IN :influencer_ids GROUP BY influencer_id) n
+    ON n.influencer_id = v.influencer_id
+LEFT JOIN (SELECT influencer_id, AVG(sentiment_score) AS avg_sentiment FROM Videos
+           WHERE influencer_id IN :influencer_ids GROUP BY influencer_id) vi
+    ON vi.influencer_id = v.influencer_id
+WHERE v.influencer_id IN :influencer_ids
+ORDER BY v.id
+""").bindparams(sqlalchemy.bindparam('influencer_ids', expanding=True))
+
+def get_vibe_inputs(influencer_ids=None):
+    """
+    Fetch the vote counts and sentiment averages needed to compute the vibe scores,
+    for every influencer or only for the given list of influencer ids.
+    """
+    if influencer_ids is None:
+        return pd.read_sql(sqlalchemy.text(VIBE_INPUTS_QUERY), get_engine())
+    return pd.read_sql(SELECTED_VIBE_INPUTS_QUERY, get_engine(), params={"influencer_ids": list(influencer_ids)})
 
-def update_vibe_scores():
+def calculate_vibe_inputs_from_frames(news, videos, votes):
     """
-    Calculate and update vibe scores for all influencers in the database.
+    Same result as get_vibe_inputs but computed in pandas from already loaded DataFrames,
+    with one groupby pass over each table instead of filtering it once per influencer.
+    """
+    news_avg = news.groupby('influencer_id')['sentiment_score'].mean().rename('avg_news_sentiment')
+    video_avg = videos.groupby('influencer_id')['sentiment_score'].mean().rename('avg_video_sentiment')
+    return (votes[['influencer_id', 'good_vote', 'bad_vote']]
+            .join(news_avg, on='influencer_id')
+            .join(video_avg, on='influencer_id'))
+
+def calculate_vibe_scores(inputs):
+    """
+    Vectorized version of calculate_vibe_score for a whole DataFrame of influencers.
+
+    Expects influencer_id, good_vote, bad_vote, avg_news_sentiment and avg_video_sentiment columns
+    and returns a Series of vibe scores indexed by influencer_id.
     """
-    # Load data from the database into Pandas DataFrames
-    News = get_data_as_dataframe('News')
-    Videos = get_data_as_dataframe('Videos')
-    Votes = get_data_as_dataframe('Votes')
-
-    # Create a dictionary to store vibe scores for each influencer_id
-    vibe_scores = {}
-
-    # Iterate over each influencer in the Votes table
-    for index, vote_row in Votes.iterrows():
-        influencer_id = vote_row['influencer_id']
-
-        # Fetch average sentiment scores for news articles related to this influencer
-        filtered_scores = News[News['influencer_id'] == influencer_id]['sentiment_score']
-        if filtered_scores.empty or filtered_scores.isna().all():
-            avg_news_sentiment = 0.0  # Default to 0 if no valid scores exist
-        else:
-            avg_news_sentiment = filtered_scores.mean()
-        
-        avg_video_sentiment = Videos[Videos['influencer_id'] == influencer_id]['sentiment_score'].mean() or 0
-
-        # Normalize sentiment scores
-        normalized_news_sentiment = normalize_sentiment(avg_news_sentiment)
-        normalized_video_sentiment = normalize_sentiment(avg_video_sentiment)
-
-        # Calculate vote score based on good and bad votes
-        vote_score = calculate_vote_score(vote_row['good_vote'], vote_row['bad_vote'])
-
-        # Calculate final vibe score
-        vibe_score = calculate_vibe_score(normalized_news_sentiment, normalized_video_sentiment, vote_score)
-
-        # Store the result in the dictionary with influencer_id as key and vibe score as value
-        vibe_scores[influencer_id] = vibe_score
-
-    # Update the Vibe Score in the Influencers table for each influencer_id
-    with engine.begin() as conn:
-        for influencer_id, vibe_score in vibe_scores.items():
-            if math.isnan(vibe_score):
-                print(f"Vibe score for influencer {influencer_id} is NaN. Defaulting to 0.0.")
-                vibe_score = 0.0
-            print(f"Updating influencer {influencer_id} with vibe score {vibe_score}")
+    # if an influencer has more than one Votes row the last one wins, as it did before
+    inputs = inputs.drop_duplicates('influencer_id', keep='last').set_index('influencer_id')
+
+    # influencers without scored news or videos count as 0 sentiment
+    news_sentiment = normalize_sentiment(inputs['avg_news_sentiment'].astype(float).fillna(0.0))
+    video_sentiment = normalize_sentiment(inputs['avg_video_sentiment'].astype(float).fillna(0.0))
+
+    good_votes = inputs['good_vote'].fillna(0).astype(float)
+    total_votes = good_votes + inputs['bad_vote'].fillna(0).astype(float)
+    vote_score = (good_votes / total_votes.where(total_votes != 0)).fillna(0.0)  # Avoid division by zero
+
+    vibe_scores = (0.25 * news_sentiment + 0.25 * video_sentiment + 0.5 * vote_score).round(2)
+    return vibe_scores.fillna(0.0)
+
+def write_vibe_scores(vibe_scores, batch_size=1000):
+    """
+    Write vibe scores (a Series indexed by influencer id) to the Influencers table,
+    batching the rows into UPDATE ... SET vibe_score = CASE id ... END statements.
+    """
+    influencers_table = get_table('Influencers')
+    ids = [int(i) for i in vibe_scores.index]
+    scores = [float(score) for score in vibe_scores]
+    with get_engine().begin() as conn:
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
             stmt = (
                 update(influencers_table)
-                .where(influencers_table.c.id == influencer_id)  # Match by 'influencer_id'
-                .values(vibe_score=vibe_score)                 # Update 'vibe_score'
+                .where(influencers_table.c.id.in_(batch_ids))  # Match by 'influencer_id'
+                .values(vibe_score=case(dict(zip(batch_ids, scores[start:start + batch_size])), value=influencers_table.c.id))
             )
             conn.execute(stmt)
+    # keep the in-memory ranking behind /Influencers/top in step with the table
+    leaderboard.update_scores(dict(zip(ids, scores)))
+
+def update_selected_vibe_scores(influencer_ids):
+    """
+    Recalculate and update the vibe scores of only the given influencers.
+    """
+    if not influencer_ids:
+        return
+    inputs = get_vibe_inputs(influencer_ids)
+    if inputs.empty:
+        return  # no Votes rows for these influencers, nothing to score
+    write_vibe_scores(calculate_vibe_scores(inputs))
+    read_cache.invalidate('Influencers')
+
+def update_vibe_scores():
+    """
+    Calculate and update vibe scores for all influencers in the database.
+    This is the full batch recompute, run it after ingestion or sentiment analysis changed many rows.
+    """
+    vibe_scores = calculate_vibe_scores(get_vibe_inputs())
+    write_vibe_scores(vibe_scores)
 
-    print("Vibe scores updated successfully.")
+    # the vibe scores in the Influencers table changed, drop the cached reads
+    read_cache.invalidate('Influencers')
+    print(f"Vibe scores updated successfully for {len(vibe_scores)} influencers.")
 
+# run the full batch recompute from the command line: python vibescore.py
+if __name__ == "__main__":
+    update_vibe_scores()
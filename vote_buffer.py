@@ -0,0 +1,196 @@
+# write-coalescing buffer for votes coming in through PUT /Votes/{influencer_id}
+
+# import the required libraries
+import os
+import threading
+import time
+from mysql.connector import Error, IntegrityError
+from dotenv import load_dotenv
+from db_pool import get_pool, PoolTimeout
+
+load_dotenv()
+
+# one statement per flush: new influencers get a row, existing ones have the deltas added atomically.
+# this relies on the UNIQUE key on Votes.influencer_id (see main.py)
+UPSERT_VOTES_QUERY = """
+INSERT INTO Votes (influencer_id, good_vote, bad_vote)
+VALUES (%s, %s, %s)
+ON DUPLICATE KEY UPDATE good_vote = good_vote + VALUES(good_vote), bad_vote = bad_vote + VALUES(bad_vote)
+"""
+
+
+def upsert_votes(rows):
+    # rows is a list of (influencer_id, good_vote, bad_vote), executemany sends them as one multi-row INSERT
+    with get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.executemany(UPSERT_VOTES_QUERY, rows)
+        connection.commit()
+
+
+def upsert_votes_one_by_one(rows, written, rejected):
+    # fallback when the batch hits an IntegrityError: each row in its own statement, so one bad row
+    # (an influencer that doesn't exist) doesn't take the rest with it. written / rejected are filled in
+    # as it goes, so the caller knows what was committed even if the connection fails half way
+    with get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            for row in rows:
+                try:
+                    cursor.execute(UPSERT_VOTES_QUERY, row)
+                    connection.commit()
+                    written.append(row)
+                except IntegrityError as e:
+                    connection.rollback()
+                    rejected.append(row)
+                    print(f"Dropping votes for influencer {row[0]}: {e}")
+
+
+class VoteBuffer:
+    """
+    Sums good/bad vote deltas per influencer in memory and writes them to the database in one batch.
+
+    A flush happens every flush_interval seconds (the durability window: votes that arrived in the last
+    flush_interval seconds are lost if the process dies) or as soon as max_pending votes are waiting.
+    With flush_interval <= 0 every vote is written straight away.
+    on_flush is called with the list of influencer ids that were written.
+
+    Rows the database rejects (IntegrityError) are dropped on their own and the rest of the batch is written.
+    A flush that fails for another reason (database down) is put back and retried with the next flush,
+    up to max_retries flushes in a row, after that the pending votes are dropped.
+    """
+
+    def __init__(self, flush_interval=0.5, max_pending=1000, on_flush=None, max_retries=10):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.max_retries = max_retries
+        self._pending = {}  # influencer_id -> [good_vote, bad_vote, votes]
+        self._retries = 0  # failed flushes in a row
+        self._pending_votes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # only one flush writes at a time
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_votes = 0
+        self.dropped_votes = 0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def _start(self):
+        if self._thread is None and self.flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="vote-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # keep the timer alive, the next tick tries again
+                print(f"Error in vote buffer flush: {e}")
+
+    def add(self, influencer_id, good_vote, bad_vote):
+        with self._lock:
+            self._start()
+            totals = self._pending.setdefault(influencer_id, [0, 0, 0])
+            totals[0] += good_vote
+            totals[1] += bad_vote
+            totals[2] += 1
+            self._pending_votes += 1
+            flush_now = self.flush_interval <= 0 or self._pending_votes >= self.max_pending
+        if flush_now:
+            # in write-through mode the caller should hear about a failed write instead of it being retried later
+            self.flush(raise_errors=self.flush_interval <= 0)
+
+    def flush(self, raise_errors=False):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, {}
+                self._pending_votes = 0
+
+            rows = [(influencer_id, good, bad) for influencer_id, (good, bad, _) in pending.items()]
+            written, rejected = [], []
+            start = time.perf_counter()
+            try:
+                try:
+                    upsert_votes(rows)
+                    written = rows
+                except IntegrityError:
+                    upsert_votes_one_by_one(rows, written, rejected)
+            except (Error, PoolTimeout) as e:
+                done = {row[0] for row in written + rejected}
+                failed = [row for row in rows if row[0] not in done]
+                with self._lock:
+                    self.failed_flushes += 1
+                    self._retries += 1
+                    self.dropped_votes += sum(pending[row[0]][2] for row in rejected)
+                    if raise_errors or self._retries > self.max_retries:
+                        self.dropped_votes += sum(pending[row[0]][2] for row in failed)
+                        retry = False
+                    else:
+                        # put the deltas back so they are retried with the next flush
+                        for influencer_id, good, bad in failed:
+                            totals = self._pending.setdefault(influencer_id, [0, 0, 0])
+                            totals[0] += good
+                            totals[1] += bad
+                            totals[2] += pending[influencer_id][2]
+                            self._pending_votes += pending[influencer_id][2]
+                        retry = True
+                if self.on_flush is not None and written:
+                    self.on_flush([row[0] for row in written])
+                if raise_errors:
+                    raise
+                if retry:
+                    print(f"Error flushing votes, retrying with the next flush: {e}")
+                else:
+                    print(f"Error flushing votes, dropping {len(failed)} influencers' votes after {self.max_retries} retries: {e}")
+                return
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._retries = 0
+                self.flushes += 1
+                self.flushed_votes += sum(pending[row[0]][2] for row in written)
+                self.dropped_votes += sum(pending[row[0]][2] for row in rejected)
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+
+        if self.on_flush is not None and written:
+            self.on_flush([row[0] for row in written])
+
+    def close(self):
+        # stop the timer and write whatever is still pending
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending_votes": self._pending_votes,
+                "pending_influencers": len(self._pending),
+                "flush_interval_ms": self.flush_interval * 1000,
+                "max_pending": self.max_pending,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "flushed_votes": self.flushed_votes,
+                "dropped_votes": self.dropped_votes,
+                "last_flush_ms": self.last_flush_ms,
+                "avg_flush_ms": self._total_flush_ms / self.flushes if self.flushes else None,
+                "max_flush_ms": self.max_flush_ms,
+            }
+
+
+def create_vote_buffer(on_flush=None):
+    return VoteBuffer(
+        flush_interval=float(os.getenv('VOTE_FLUSH_INTERVAL_MS', 500)) / 1000,
+        max_pending=int(os.getenv('VOTE_FLUSH_MAX_PENDING', 1000)),
+        max_retries=int(os.getenv('VOTE_FLUSH_MAX_RETRIES', 10)),
+        on_flush=on_flush,
+    )